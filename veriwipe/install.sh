@@ -85,6 +85,7 @@ install_veriwipe() {
     # Copy source files
     cp -r src "$INSTALL_DIR/"
     cp -r config "$INSTALL_DIR/"
+    cp -r verification "$INSTALL_DIR/"
     cp veriwipe.py "$INSTALL_DIR/"
     cp requirements.txt "$INSTALL_DIR/"
     
@@ -173,7 +174,7 @@ Type=simple
 User=veriwipe
 Group=veriwipe
 WorkingDirectory=$INSTALL_DIR
-ExecStart=$INSTALL_DIR/venv/bin/python verification/web_verifier.py
+ExecStart=$INSTALL_DIR/venv/bin/gunicorn -c $INSTALL_DIR/verification/gunicorn.conf.py
 Restart=always
 RestartSec=10
 
@@ -184,6 +185,10 @@ EOF
     # Create service user
     useradd -r -s /bin/false -d "$INSTALL_DIR" veriwipe 2>/dev/null || true
     
+    # QR codes rendered at certificate issuance; the verification server only serves them
+    mkdir -p "$INSTALL_DIR/qr"
+    chown veriwipe:veriwipe "$INSTALL_DIR/qr"
+    
     success "Verification service created"
 }
 
@@ -279,7 +279,7 @@ import sys
 sys.path.insert(0, '/opt/veriwipe/src')
 try:
     from utils.smart_dependency_manager import smart_dependency_check
-    if smart_dependency_check():
+    if smart_dependency_check(early_exit=True):
         print('✅ All dependencies satisfied')
     else:
         print('❌ Some dependencies missing')
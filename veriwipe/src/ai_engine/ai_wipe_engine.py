@@ -4,16 +4,65 @@ VeriWipe AI Engine - Adaptive Wipe Method Selection and Error Resolution
 """
 
 import json
+import hashlib
 import logging
 import subprocess
 import re
+import os
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
-import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-import pickle
-import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, lru_cache, partial
+
+# Upper bound for a single probe (smartctl, hdparm, ...) so one hung device
+# cannot stall detection of the others
+PROBE_TIMEOUT = 30
+
+# How long probe output stays valid: discovery data (SMART, IDENTIFY) vs
+# system-wide readiness state such as the mount table
+DISCOVERY_TTL = 5
+READINESS_TTL = 30
+
+# lsblk columns requested once per scan; enough to describe a disk without probing it
+LSBLK_COLUMNS = 'NAME,TYPE,SIZE,MODEL,SERIAL,TRAN,ROTA,DISC-GRAN,RQ-SIZE'
+
+# On-disk signature at offset 0 of LUKS1 and LUKS2 headers
+LUKS_MAGIC = b'LUKS\xba\xbe'
+
+# Encryption schemes wiped by destroying the key, whatever the device supports
+_CRYPTO_ERASE_ENCRYPTION = ('LUKS', 'BitLocker')
+
+# Patterns for feature extraction, matched against lowercased probe output
+_RPM_RE = re.compile(rb'(\d+)\s*rpm')
+_POWER_HOURS_RE = re.compile(rb'power.on.hours.*?(\d+)')
+_TEMPERATURE_RE = re.compile(rb'temperature.*?(\d+)')
+
+# Keywords used by classification and feature extraction, found in a single
+# scan per blob. The lookahead lets overlapping keywords ('emmc'/'mmc') match.
+_KEYWORDS = ('nvme', 'solid state', 'ssd', 'emmc', 'mmc', 'usb', 'rotating',
+             'disk', 'trim', 'sata 6', 'sata 3')
+_KEYWORD_RE = re.compile(b'(?=(' + b'|'.join(re.escape(k.encode()) for k in _KEYWORDS) + b'))',
+                         re.IGNORECASE)
+
+@lru_cache(maxsize=64)
+def _scan_keywords(data: bytes) -> frozenset:
+    """Return the set of known keywords present in raw probe output"""
+    return frozenset(match.group(1).lower().decode() for match in _KEYWORD_RE.finditer(data))
+
+@lru_cache(maxsize=None)
+def _init_sklearn():
+    """Prepare sklearn before the first model is loaded or trained"""
+    # Optionally route RandomForest fit/predict through Intel's oneDAL kernels;
+    # this must happen before any forest is unpickled or constructed
+    if os.environ.get('VERIWIPE_USE_SKLEARNEX') == '1':
+        try:
+            from sklearnex import patch_sklearn
+            patch_sklearn()
+        except ImportError:
+            pass
 
 class DeviceType(Enum):
     HDD = "hdd"
@@ -32,6 +81,85 @@ class WipeMethod(Enum):
     CRYPTO_ERASE = "crypto_erase"
     FACTORY_RESET = "factory_reset"
 
+# Model prediction index -> enum member
+_DEVICE_TYPES = tuple(DeviceType)
+_WIPE_METHODS = tuple(WipeMethod)
+
+# Stable categorical encodings for the method selector (str.__hash__ is salted per process)
+_TYPE_CODE = {
+    DeviceType.HDD: 0,
+    DeviceType.SSD_SATA: 1,
+    DeviceType.SSD_NVME: 2,
+    DeviceType.EMMC: 3,
+    DeviceType.USB: 4,
+    DeviceType.UNKNOWN: 5
+}
+_IFACE_CODE = {'sata': 0, 'nvme': 1, 'usb': 2, 'mmc': 3, 'sas': 4, 'ata': 5, 'scsi': 6}
+_UNKNOWN_IFACE_CODE = 9
+
+# Error diagnosis rules in priority order: (message phrases, resolution)
+_ERROR_RULES = [
+    (("permission denied",), {
+        "diagnosis": "Insufficient permissions",
+        "suggested_actions": ["Run as root/administrator", "Check device permissions"],
+        "confidence": 0.9
+    }),
+    (("device busy", "resource busy"), {
+        "diagnosis": "Device is mounted or in use",
+        "suggested_actions": ["Unmount device", "Stop processes using device", "Kill fuser processes"],
+        "confidence": 0.95
+    }),
+    (("not supported",), {
+        "diagnosis": "Operation not supported by device",
+        "suggested_actions": ["Try alternative wipe method"],
+        "alternative_method": WipeMethod.SINGLE_PASS_RANDOM,
+        "confidence": 0.8
+    }),
+    (("timeout",), {
+        "diagnosis": "Operation timeout",
+        "suggested_actions": ["Increase timeout", "Check device health", "Try slower method"],
+        "confidence": 0.7
+    })
+]
+_ERROR_RE = re.compile('|'.join(
+    f"(?P<r{i}>{'|'.join(map(re.escape, phrases))})"
+    for i, (phrases, _) in enumerate(_ERROR_RULES)
+))
+
+class _SubprocCache:
+    """TTL cache of probe command results keyed by argv"""
+    
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._entries: Dict[Tuple[str, ...], Tuple[float, subprocess.CompletedProcess]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def run(self, cmd: List[str], ttl: float = DISCOVERY_TTL) -> subprocess.CompletedProcess:
+        """Run a probe command, reusing a cached result younger than ttl seconds"""
+        key = tuple(cmd)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.monotonic() - entry[0] < ttl:
+                self.hits += 1
+                self.logger.debug(f"Probe cache hit: {' '.join(key)} (hits={self.hits}, misses={self.misses})")
+                return entry[1]
+            self.misses += 1
+        
+        # Output stays as bytes: consumers only run ASCII searches over it.
+        # Timeouts propagate and are never cached, so a hung tool is retried next time
+        result = subprocess.run(list(key), capture_output=True, timeout=PROBE_TIMEOUT)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), result)
+        self.logger.debug(f"Probe cache miss: {' '.join(key)} (hits={self.hits}, misses={self.misses})")
+        return result
+    
+    def clear(self):
+        """Drop all cached probe results"""
+        with self._lock:
+            self._entries.clear()
+
 @dataclass
 class DeviceInfo:
     device_path: str
@@ -41,9 +169,20 @@ class DeviceInfo:
     size_gb: float
     interface: str
     encryption_status: str
-    hpa_dco_present: bool
-    secure_erase_supported: bool
+    # None when detection skipped the probe (see detect_devices)
+    hpa_dco_present: Optional[bool]
+    secure_erase_supported: Optional[bool]
     features: Dict[str, any]
+    
+    @cached_property
+    def device_path_hash(self) -> str:
+        """Short SHA-256 fingerprint of the device path, computed once"""
+        return hashlib.sha256(self.device_path.encode()).hexdigest()[:16]
+    
+    @cached_property
+    def serial_hash(self) -> str:
+        """Short SHA-256 fingerprint of the serial number, computed once"""
+        return hashlib.sha256(self.serial.encode()).hexdigest()[:16]
 
 class AIWipeEngine:
     def __init__(self, model_path: str = None):
@@ -51,16 +190,23 @@ class AIWipeEngine:
         self.model_path = model_path or "/opt/veriwipe/models/wipe_method_selector.pkl"
         self.device_classifier = None
         self.method_selector = None
+        self._cache = _SubprocCache()
+        self._mount_table: Optional[bytes] = None
         self.load_models()
         
     def load_models(self):
         """Load pre-trained AI models for device classification and method selection"""
         try:
             if os.path.exists(self.model_path):
-                with open(self.model_path, 'rb') as f:
-                    models = pickle.load(f)
-                    self.device_classifier = models.get('device_classifier')
-                    self.method_selector = models.get('method_selector')
+                # numpy/sklearn/joblib are only imported when a model actually exists
+                import joblib
+                _init_sklearn()
+                
+                # Memory-map the forests' arrays instead of copying them onto the heap;
+                # compressed or plain-pickle model files are simply loaded into memory
+                models = joblib.load(self.model_path, mmap_mode='r')
+                self.device_classifier = models.get('device_classifier')
+                self.method_selector = models.get('method_selector')
                 self.logger.info("AI models loaded successfully")
             else:
                 self.logger.warning("No pre-trained models found. Using rule-based fallback.")
@@ -70,132 +216,206 @@ class AIWipeEngine:
             self.initialize_fallback_models()
     
     def initialize_fallback_models(self):
-        """Initialize simple rule-based models as fallback"""
-        # Create basic classifiers - in production these would be pre-trained
-        self.device_classifier = RandomForestClassifier(n_estimators=10, random_state=42)
-        self.method_selector = RandomForestClassifier(n_estimators=10, random_state=42)
-        
-        # Train with minimal synthetic data for demo purposes
-        X_device = np.random.rand(100, 5)  # Features: size, interface_type, etc.
-        y_device = np.random.randint(0, 5, 100)  # Device types
-        
-        X_method = np.random.rand(100, 6)  # Features: device_type, size, encryption, etc.
-        y_method = np.random.randint(0, 7, 100)  # Wipe methods
-        
-        self.device_classifier.fit(X_device, y_device)
-        self.method_selector.fit(X_method, y_method)
+        """Fall back to deterministic rule-based classification and selection"""
+        # Without pre-trained models the rule-based paths are used directly;
+        # a forest fitted on random data would only add noise and startup cost
+        self.device_classifier = None
+        self.method_selector = None
+        self.logger.info("Using deterministic rule-based selection.")
     
-    def detect_devices(self) -> List[DeviceInfo]:
-        """Detect all storage devices and classify them using AI"""
+    def detect_devices(self, force: bool = False, deep_probe: bool = False) -> List[DeviceInfo]:
+        """Detect all storage devices and classify them using AI
+        
+        Devices are described from lsblk and sysfs alone; deep_probe adds the
+        smartctl/hdparm/nvme feature probes and the HPA/DCO check. Secure erase
+        support is only probed when the method selection depends on it.
+        """
         devices = []
         
+        # Forced rescans must not reuse cached probe output
+        if force:
+            self._cache.clear()
+        
         try:
-            # Get block devices
-            result = subprocess.run(['lsblk', '-J', '-o', 'NAME,TYPE,SIZE,MODEL,SERIAL,TRAN'], 
-                                  capture_output=True, text=True, check=True)
+            # Snapshot the mount table once for all devices in this scan
+            self._mount_table = self._read_mount_table()
+            
+            # Get block devices, sized in bytes (-b) rather than rounded unit strings
+            result = subprocess.run(['lsblk', '-b', '-J', '-o', LSBLK_COLUMNS], 
+                                  capture_output=True, check=True, timeout=PROBE_TIMEOUT)
             block_devices = json.loads(result.stdout)
             
-            for device in block_devices.get('blockdevices', []):
-                if device.get('type') == 'disk':
-                    device_info = self._analyze_device(device)
-                    if device_info:
-                        devices.append(device_info)
+            disks = [device for device in block_devices.get('blockdevices', [])
+                     if device.get('type') == 'disk']
+            
+            # Probes are IO-bound subprocess waits, so analyze disks concurrently
+            if disks:
+                with ThreadPoolExecutor(max_workers=min(32, len(disks))) as executor:
+                    probe_device = partial(self._probe_device, deep_probe=deep_probe)
+                    probes = [p for p in executor.map(probe_device, disks) if p]
+                    
+                    # Classify all devices with a single model call
+                    device_types = self._classify_device_types([p['features'] for p in probes])
+                    devices = [d for d in executor.map(self._build_device_info, probes, device_types) if d]
                         
         except Exception as e:
             self.logger.error(f"Error detecting devices: {e}")
         
         return devices
     
-    def _analyze_device(self, device_data: Dict) -> Optional[DeviceInfo]:
+    def _analyze_device(self, device_data: Dict, deep_probe: bool = False) -> Optional[DeviceInfo]:
         """Analyze individual device using AI classification"""
+        probe = self._probe_device(device_data, deep_probe)
+        if not probe:
+            return None
+        return self._build_device_info(probe, self._classify_device_type(probe['features']))
+    
+    def _probe_device(self, device_data: Dict, deep_probe: bool = False) -> Optional[Dict]:
+        """Collect the type-independent information for a device"""
         try:
             device_path = f"/dev/{device_data['name']}"
+            features = self._get_sysfs_features(device_data)
             
-            # Extract basic information
-            model = device_data.get('model', 'Unknown')
-            serial = device_data.get('serial', 'Unknown')
-            size_str = device_data.get('size', '0B')
-            interface = device_data.get('tran', 'unknown')
-            
-            # Parse size
-            size_gb = self._parse_size_to_gb(size_str)
-            
-            # Get detailed device information
-            features = self._get_device_features(device_path)
-            
-            # Classify device type using AI
-            device_type = self._classify_device_type(features)
-            
-            # Check for encryption, HPA/DCO
-            encryption_status = self._check_encryption(device_path)
-            hpa_dco_present = self._check_hpa_dco(device_path)
-            secure_erase_supported = self._check_secure_erase_support(device_path, device_type)
-            
-            return DeviceInfo(
-                device_path=device_path,
-                device_type=device_type,
-                model=model,
-                serial=serial,
-                size_gb=size_gb,
-                interface=interface,
-                encryption_status=encryption_status,
-                hpa_dco_present=hpa_dco_present,
-                secure_erase_supported=secure_erase_supported,
-                features=features
-            )
+            # Run independent probes concurrently; hdparm -N is left to deep probes and the
+            # model, the wipe engine checks HPA/DCO itself before wiping
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                encryption_future = executor.submit(self._check_encryption, device_path)
+                hpa_dco_future = None
+                if deep_probe or self.method_selector is not None:
+                    hpa_dco_future = executor.submit(self.check_hpa_dco, device_path)
+                if deep_probe:
+                    # Real probe output supersedes the synthesized hints
+                    features.update((key, value) for key, value in
+                                    self._get_device_features(device_path).items() if value)
+                
+                return {
+                    'device_path': device_path,
+                    'model': device_data.get('model', 'Unknown'),
+                    'serial': device_data.get('serial', 'Unknown'),
+                    'size_gb': float(device_data.get('size') or 0) / (1 << 30),
+                    'interface': device_data.get('tran', 'unknown'),
+                    'features': features,
+                    'encryption_status': encryption_future.result(),
+                    'hpa_dco_present': hpa_dco_future.result() if hpa_dco_future else None
+                }
             
         except Exception as e:
             self.logger.error(f"Error analyzing device {device_data}: {e}")
             return None
     
+    def _build_device_info(self, probe: Dict, device_type: DeviceType) -> Optional[DeviceInfo]:
+        """Finish device analysis once its type is known"""
+        try:
+            # Rule-based selection ignores secure erase support for encrypted and unknown devices
+            if self.method_selector is None and (probe['encryption_status'] in _CRYPTO_ERASE_ENCRYPTION
+                                                 or device_type == DeviceType.UNKNOWN):
+                secure_erase_supported = None
+            else:
+                secure_erase_supported = self._check_secure_erase_support(probe['device_path'], device_type)
+            return DeviceInfo(device_type=device_type,
+                              secure_erase_supported=secure_erase_supported,
+                              **probe)
+        except Exception as e:
+            self.logger.error(f"Error analyzing device {probe['device_path']}: {e}")
+            return None
+    
+    def _get_sysfs_features(self, device_data: Dict) -> Dict:
+        """Derive device features from lsblk columns and sysfs without probing the device"""
+        name = device_data['name']
+        transport = (device_data.get('tran') or '').lower()
+        
+        rotational = None
+        try:
+            with open(f"/sys/block/{name}/queue/rotational") as f:
+                rotational = f.read().strip() == '1'
+        except OSError:
+            if device_data.get('rota') is not None:
+                rotational = device_data['rota'] in (True, 1, '1')
+        
+        # Synthesized hint in the vocabulary of smartctl output, so the
+        # rule-based classifier works without running smartctl
+        if transport == 'nvme' or name.startswith('nvme'):
+            hint = b'nvme'
+        elif transport == 'usb':
+            hint = b'usb'
+        elif transport == 'mmc' or name.startswith('mmcblk'):
+            hint = b'emmc'
+        elif rotational is True:
+            hint = b'rotating'
+        elif rotational is False:
+            hint = b'solid state'
+        else:
+            hint = b''
+        
+        return {
+            'rotational': rotational,
+            'transport': transport,
+            'discard_granularity': int(device_data.get('disc-gran') or 0),
+            'request_queue_size': int(device_data.get('rq-size') or 0),
+            'smart_data': hint
+        }
+    
     def _get_device_features(self, device_path: str) -> Dict:
         """Extract detailed device features for AI analysis"""
         features = {}
         
-        try:
-            # Get SMART data
-            smart_result = subprocess.run(['smartctl', '-a', device_path], 
-                                        capture_output=True, text=True)
-            features['smart_data'] = smart_result.stdout
-            
-            # Get detailed device info
-            hdparm_result = subprocess.run(['hdparm', '-I', device_path], 
-                                         capture_output=True, text=True)
-            features['hdparm_info'] = hdparm_result.stdout
-            
-            # Check if it's NVMe
-            if 'nvme' in device_path:
-                nvme_result = subprocess.run(['nvme', 'id-ctrl', device_path], 
-                                           capture_output=True, text=True)
-                features['nvme_info'] = nvme_result.stdout
-                
-        except Exception as e:
-            self.logger.debug(f"Could not get all features for {device_path}: {e}")
+        # SMART data and detailed device info
+        probes = {
+            'smart_data': ['smartctl', '-a', device_path],
+            'hdparm_info': ['hdparm', '-I', device_path]
+        }
+        
+        # Check if it's NVMe
+        if 'nvme' in device_path:
+            probes['nvme_info'] = ['nvme', 'id-ctrl', device_path]
+        
+        with ThreadPoolExecutor(max_workers=len(probes)) as executor:
+            futures = {
+                key: executor.submit(self._cache.run, cmd)
+                for key, cmd in probes.items()
+            }
+            for key, future in futures.items():
+                try:
+                    features[key] = future.result().stdout
+                except Exception as e:
+                    self.logger.debug(f"Could not get {key} for {device_path}: {e}")
         
         return features
     
     def _classify_device_type(self, features: Dict) -> DeviceType:
         """Use AI to classify device type based on features"""
-        # Extract numerical features for AI model
-        feature_vector = self._extract_feature_vector(features)
-        
-        if self.device_classifier and len(feature_vector) >= 5:
+        return self._classify_device_types([features])[0]
+    
+    def _classify_device_types(self, features_list: List[Dict]) -> List[DeviceType]:
+        """Classify several devices with one batched model call"""
+        predictions = None
+        if self.device_classifier and features_list:
             try:
-                prediction = self.device_classifier.predict([feature_vector])[0]
-                device_types = list(DeviceType)
-                if 0 <= prediction < len(device_types):
-                    return device_types[prediction]
+                import numpy as np
+                
+                # Extract numerical features for AI model into one contiguous batch
+                X = np.zeros((len(features_list), 5))
+                for i, features in enumerate(features_list):
+                    X[i] = self._extract_feature_vector(features)
+                predictions = self.device_classifier.predict(X)
             except Exception as e:
                 self.logger.debug(f"AI classification failed: {e}")
         
-        # Fallback to rule-based classification
-        return self._rule_based_device_classification(features)
+        results = []
+        for i, features in enumerate(features_list):
+            if predictions is not None and 0 <= predictions[i] < len(_DEVICE_TYPES):
+                results.append(_DEVICE_TYPES[predictions[i]])
+            else:
+                # Fallback to rule-based classification
+                results.append(self._rule_based_device_classification(features))
+        
+        return results
     
     def _rule_based_device_classification(self, features: Dict) -> DeviceType:
         """Fallback rule-based device classification"""
-        smart_data = features.get('smart_data', '').lower()
-        hdparm_info = features.get('hdparm_info', '').lower()
-        nvme_info = features.get('nvme_info', '').lower()
+        smart_data = _scan_keywords(features.get('smart_data', b''))
+        hdparm_info = _scan_keywords(features.get('hdparm_info', b''))
+        nvme_info = features.get('nvme_info', b'')
         
         if nvme_info or 'nvme' in smart_data:
             return DeviceType.SSD_NVME
@@ -214,35 +434,38 @@ class AIWipeEngine:
         """Extract numerical features for AI model"""
         vector = []
         
-        smart_data = features.get('smart_data', '')
-        hdparm_info = features.get('hdparm_info', '')
+        # Lowercase SMART data once for the numeric searches; keyword checks
+        # share the single cached scan with the rule-based classifier
+        smart_data = features.get('smart_data', b'').lower()
+        smart_keywords = _scan_keywords(features.get('smart_data', b''))
+        hdparm_keywords = _scan_keywords(features.get('hdparm_info', b''))
         
         # Feature 1: Rotation speed (0 for SSD, >0 for HDD)
-        rotation_match = re.search(r'(\d+)\s*rpm', smart_data.lower())
+        rotation_match = _RPM_RE.search(smart_data)
         rotation_speed = float(rotation_match.group(1)) if rotation_match else 0.0
         vector.append(rotation_speed)
         
         # Feature 2: Has TRIM support (1 for SSD, 0 for HDD)
-        trim_support = 1.0 if 'trim' in hdparm_info.lower() else 0.0
+        trim_support = 1.0 if 'trim' in hdparm_keywords else 0.0
         vector.append(trim_support)
         
         # Feature 3: Interface speed indicator
         interface_speed = 0.0
-        if 'sata 6' in smart_data.lower():
+        if 'sata 6' in smart_keywords:
             interface_speed = 6.0
-        elif 'sata 3' in smart_data.lower():
+        elif 'sata 3' in smart_keywords:
             interface_speed = 3.0
-        elif 'nvme' in smart_data.lower():
+        elif 'nvme' in smart_keywords:
             interface_speed = 32.0  # PCIe indicator
         vector.append(interface_speed)
         
         # Feature 4: Power-on hours (age indicator)
-        power_hours_match = re.search(r'power.on.hours.*?(\d+)', smart_data.lower())
+        power_hours_match = _POWER_HOURS_RE.search(smart_data)
         power_hours = float(power_hours_match.group(1)) if power_hours_match else 0.0
         vector.append(power_hours)
         
         # Feature 5: Temperature (operational indicator)
-        temp_match = re.search(r'temperature.*?(\d+)', smart_data.lower())
+        temp_match = _TEMPERATURE_RE.search(smart_data)
         temperature = float(temp_match.group(1)) if temp_match else 25.0
         vector.append(temperature)
         
@@ -252,43 +475,42 @@ class AIWipeEngine:
         
         return vector[:5]  # Ensure exactly 5 features
     
-    def _parse_size_to_gb(self, size_str: str) -> float:
-        """Parse size string to GB"""
-        size_str = size_str.upper()
-        multipliers = {'K': 1e-6, 'M': 1e-3, 'G': 1, 'T': 1e3}
-        
-        for unit, multiplier in multipliers.items():
-            if unit in size_str:
-                number = re.findall(r'[\d.]+', size_str)
-                if number:
-                    return float(number[0]) * multiplier
-        return 0.0
-    
     def _check_encryption(self, device_path: str) -> str:
         """Check if device is encrypted"""
         try:
-            # Check for LUKS
-            luks_result = subprocess.run(['cryptsetup', 'isLuks', device_path], 
-                                       capture_output=True)
-            if luks_result.returncode == 0:
+            # Check for LUKS by its header magic
+            try:
+                with open(device_path, 'rb') as f:
+                    is_luks = f.read(len(LUKS_MAGIC)) == LUKS_MAGIC
+            except OSError:
+                # Device not readable directly, let cryptsetup decide
+                is_luks = self._cache.run(['cryptsetup', 'isLuks', device_path]).returncode == 0
+            if is_luks:
                 return "LUKS"
             
             # Check for BitLocker (when mounted)
-            mount_result = subprocess.run(['mount'], capture_output=True, text=True)
-            if device_path in mount_result.stdout and 'bitlocker' in mount_result.stdout.lower():
+            mount_table = self._mount_table if self._mount_table is not None else self._read_mount_table()
+            if device_path.encode() in mount_table and b'bitlocker' in mount_table.lower():
                 return "BitLocker"
             
             return "None"
         except Exception:
             return "Unknown"
     
-    def _check_hpa_dco(self, device_path: str) -> bool:
+    def _read_mount_table(self) -> bytes:
+        """Read the current mount table without spawning mount(8)"""
+        try:
+            with open('/proc/self/mountinfo', 'rb') as f:
+                return f.read()
+        except OSError:
+            return self._cache.run(['mount'], ttl=READINESS_TTL).stdout
+    
+    def check_hpa_dco(self, device_path: str) -> bool:
         """Check for Host Protected Area (HPA) or Device Configuration Overlay (DCO)"""
         try:
-            result = subprocess.run(['hdparm', '-N', device_path], 
-                                  capture_output=True, text=True)
+            result = self._cache.run(['hdparm', '-N', device_path])
             output = result.stdout.lower()
-            return 'hpa' in output or 'dco' in output or 'protected' in output
+            return b'hpa' in output or b'dco' in output or b'protected' in output
         except Exception:
             return False
     
@@ -296,46 +518,56 @@ class AIWipeEngine:
         """Check if device supports secure erase"""
         try:
             if device_type == DeviceType.SSD_NVME:
-                result = subprocess.run(['nvme', 'id-ctrl', device_path], 
-                                      capture_output=True, text=True)
-                return 'format' in result.stdout.lower()
+                result = self._cache.run(['nvme', 'id-ctrl', device_path])
+                return b'format' in result.stdout.lower()
             else:
-                result = subprocess.run(['hdparm', '-I', device_path], 
-                                      capture_output=True, text=True)
-                return 'erase_unit_max' in result.stdout.lower()
+                result = self._cache.run(['hdparm', '-I', device_path])
+                return b'erase_unit_max' in result.stdout.lower()
         except Exception:
             return False
     
     def select_optimal_wipe_method(self, device_info: DeviceInfo) -> WipeMethod:
         """Use AI to select the optimal wipe method for the device"""
-        # Create feature vector for method selection
-        method_features = [
-            device_info.device_type.value.__hash__() % 10,  # Device type encoding
-            device_info.size_gb,
-            1.0 if device_info.encryption_status != "None" else 0.0,
-            1.0 if device_info.secure_erase_supported else 0.0,
-            1.0 if device_info.hpa_dco_present else 0.0,
-            device_info.interface.__hash__() % 10  # Interface encoding
-        ]
-        
-        if self.method_selector:
+        return self.select_optimal_wipe_methods([device_info])[0]
+    
+    def select_optimal_wipe_methods(self, devices: List[DeviceInfo]) -> List[WipeMethod]:
+        """Select wipe methods for several devices with one batched model call"""
+        predictions = None
+        if self.method_selector and devices:
             try:
-                prediction = self.method_selector.predict([method_features])[0]
-                methods = list(WipeMethod)
-                if 0 <= prediction < len(methods):
-                    selected_method = methods[prediction]
-                    self.logger.info(f"AI selected method: {selected_method}")
-                    return selected_method
+                import numpy as np
+                
+                # Create feature vectors for method selection in one contiguous batch
+                X = np.zeros((len(devices), 6))
+                for i, device_info in enumerate(devices):
+                    X[i] = (
+                        _TYPE_CODE.get(device_info.device_type, _TYPE_CODE[DeviceType.UNKNOWN]),
+                        device_info.size_gb,
+                        1.0 if device_info.encryption_status != "None" else 0.0,
+                        1.0 if device_info.secure_erase_supported else 0.0,
+                        1.0 if device_info.hpa_dco_present else 0.0,
+                        _IFACE_CODE.get((device_info.interface or '').lower(), _UNKNOWN_IFACE_CODE)
+                    )
+                predictions = self.method_selector.predict(X)
             except Exception as e:
                 self.logger.debug(f"AI method selection failed: {e}")
         
-        # Fallback to rule-based selection
-        return self._rule_based_method_selection(device_info)
+        results = []
+        for i, device_info in enumerate(devices):
+            if predictions is not None and 0 <= predictions[i] < len(_WIPE_METHODS):
+                selected_method = _WIPE_METHODS[predictions[i]]
+                self.logger.info(f"AI selected method: {selected_method}")
+                results.append(selected_method)
+            else:
+                # Fallback to rule-based selection
+                results.append(self._rule_based_method_selection(device_info))
+        
+        return results
     
     def _rule_based_method_selection(self, device_info: DeviceInfo) -> WipeMethod:
         """Fallback rule-based method selection"""
         # Encryption-first approach
-        if device_info.encryption_status in ["LUKS", "BitLocker"]:
+        if device_info.encryption_status in _CRYPTO_ERASE_ENCRYPTION:
             return WipeMethod.CRYPTO_ERASE
         
         # Device-specific optimal methods
@@ -369,37 +601,13 @@ class AIWipeEngine:
             "confidence": 0.5
         }
         
-        error_lower = error_message.lower()
-        
-        # Pattern matching for common errors
-        if "permission denied" in error_lower:
-            resolution.update({
-                "diagnosis": "Insufficient permissions",
-                "suggested_actions": ["Run as root/administrator", "Check device permissions"],
-                "confidence": 0.9
-            })
-        
-        elif "device busy" in error_lower or "resource busy" in error_lower:
-            resolution.update({
-                "diagnosis": "Device is mounted or in use",
-                "suggested_actions": ["Unmount device", "Stop processes using device", "Kill fuser processes"],
-                "confidence": 0.95
-            })
-        
-        elif "not supported" in error_lower:
-            resolution.update({
-                "diagnosis": "Operation not supported by device",
-                "suggested_actions": ["Try alternative wipe method"],
-                "alternative_method": WipeMethod.SINGLE_PASS_RANDOM,
-                "confidence": 0.8
-            })
-        
-        elif "timeout" in error_lower:
-            resolution.update({
-                "diagnosis": "Operation timeout",
-                "suggested_actions": ["Increase timeout", "Check device health", "Try slower method"],
-                "confidence": 0.7
-            })
+        # Pattern matching for common errors in a single scan; when several
+        # rules match, the earliest rule in the table wins
+        matched = {int(match.lastgroup[1:]) for match in _ERROR_RE.finditer(error_message.lower())}
+        if matched:
+            rule = _ERROR_RULES[min(matched)][1]
+            resolution.update(rule)
+            resolution["suggested_actions"] = list(rule["suggested_actions"])
         
         return resolution
 
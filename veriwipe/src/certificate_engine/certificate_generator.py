@@ -5,15 +5,16 @@ VeriWipe Certificate Engine - Tamper-Proof Certificate Generation
 
 import json
 import hashlib
+import struct
 import time
-import uuid
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Any, Tuple
+from dataclasses import dataclass
+from functools import lru_cache
 import os
 import base64
 from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
 from cryptography.hazmat.primitives.serialization import load_pem_private_key, load_pem_public_key
 from cryptography.exceptions import InvalidSignature
 import qrcode
@@ -25,8 +26,96 @@ from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 import io
 
+# orjson is optional; it is only used for non-canonical (pretty) output
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Log-chain hash functions by tag; BLAKE3 is preferred for new entries when installed
+_LOG_HASHES = {"sha256": hashlib.sha256}
+try:
+    import blake3
+    _LOG_HASHES["blake3"] = blake3.blake3
+    _LOG_HASH = "blake3"
+except ImportError:
+    _LOG_HASH = "sha256"
+
+# Entries written before the packed layout hash an f-string of their fields with SHA-256
+_LEGACY_LOG_HASH = "sha256-legacy"
+
 from wipe_core.wipe_engine import WipeOperation, WipeStatus
 
+# The web verifier's /qr/<id> serves PNGs from this directory; they are rendered here at issuance
+_QR_DIR = os.environ.get('VERIWIPE_QR_DIR', '/opt/veriwipe/qr')
+_VERIFY_BASE_URL = os.environ.get('VERIWIPE_VERIFY_BASE_URL', 'https://verify.veriwipe.org/')
+
+def _verification_url(certificate_id: str) -> str:
+    """Public verification page for a certificate, as encoded in every QR code"""
+    return f"{_VERIFY_BASE_URL}verify/{certificate_id}"
+
+# NIST SP 800-88 classification per wipe method
+_NIST_CLASSIFICATIONS = {
+    "ata_secure_erase": "Purge",
+    "nvme_secure_erase": "Purge",
+    "nvme_crypto_erase": "Purge",
+    "crypto_erase": "Purge",
+    "multipass_overwrite": "Purge",
+    "single_pass_random": "Clear",
+    "factory_reset": "Clear"
+}
+
+@lru_cache(maxsize=None)
+def _nist_for(method_value: str) -> str:
+    """NIST SP 800-88 classification for a wipe method value"""
+    return _NIST_CLASSIFICATIONS.get(method_value, "Unknown")
+
+# PDF styles are built once; reportlab style construction is comparatively expensive
+_PDF_STYLES = getSampleStyleSheet()
+_TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=_PDF_STYLES['Heading1'],
+    fontSize=24,
+    spaceAfter=30,
+    alignment=TA_CENTER,
+    textColor=colors.darkblue
+)
+_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 14),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+def _new_id() -> str:
+    """Random 128-bit identifier as 32 hex characters"""
+    return os.urandom(16).hex()
+
+@lru_cache(maxsize=8)
+def _iso_second(seconds: int) -> str:
+    """ISO-8601 prefix (to the second) for a UTC epoch second"""
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%S')
+
+def _iso_timestamp(timestamp_ns: int) -> str:
+    """Format epoch nanoseconds as an ISO-8601 UTC timestamp with microseconds"""
+    seconds, remainder = divmod(timestamp_ns, 1_000_000_000)
+    return f"{_iso_second(seconds)}.{remainder // 1000:06d}+00:00"
+
+@lru_cache(maxsize=4)
+def _load_keypair(private_key_path: str, private_mtime: int, public_key_path: str, public_mtime: int):
+    """Parse a PEM key pair once per (path, mtime); a rotated key changes the mtime"""
+    with open(private_key_path, 'rb') as f:
+        private_key = load_pem_private_key(f.read(), password=None)
+    
+    with open(public_key_path, 'rb') as f:
+        public_key = load_pem_public_key(f.read())
+    
+    return private_key, public_key
+
 @dataclass
 class LogEntry:
     timestamp: float
@@ -35,15 +124,51 @@ class LogEntry:
     level: str
     previous_hash: str
     entry_hash: str = ""
+    # Entries stored without the field predate it; new entries always name their algorithm
+    hash_algorithm: str = _LEGACY_LOG_HASH
     
     def __post_init__(self):
-        if not self.entry_hash:
-            self.entry_hash = self.calculate_hash()
+        # Raw digests are used for chain checks; hex is only kept for serialization
+        self._previous_digest = bytes.fromhex(self.previous_hash)
+        if self.entry_hash:
+            self._digest = bytes.fromhex(self.entry_hash)
+        else:
+            self._digest = self.calculate_digest()
+            self.entry_hash = self._digest.hex()
+    
+    def calculate_digest(self) -> bytes:
+        """Calculate the raw 32-byte digest of this log entry"""
+        if self.hash_algorithm == _LEGACY_LOG_HASH:
+            data = f"{self.timestamp}{self.entry_id}{self.message}{self.level}{self.previous_hash}"
+            return hashlib.sha256(data.encode()).digest()
+        
+        entry_id = self.entry_id.encode()
+        message = self.message.encode()
+        level = self.level.encode()
+        
+        # Length-prefixed fields keep the hashed layout unambiguous
+        buf = bytearray(struct.pack('<dIII', self.timestamp, len(entry_id), len(message), len(level)))
+        buf += entry_id
+        buf += message
+        buf += level
+        buf += self._previous_digest
+        return _LOG_HASHES[self.hash_algorithm](buf).digest()
     
     def calculate_hash(self) -> str:
         """Calculate hash of this log entry"""
-        data = f"{self.timestamp}{self.entry_id}{self.message}{self.level}{self.previous_hash}"
-        return hashlib.sha256(data.encode()).hexdigest()
+        return self.calculate_digest().hex()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable form of this entry (flat, so no asdict() traversal)"""
+        return {
+            "timestamp": self.timestamp,
+            "entry_id": self.entry_id,
+            "message": self.message,
+            "level": self.level,
+            "previous_hash": self.previous_hash,
+            "entry_hash": self.entry_hash,
+            "hash_algorithm": self.hash_algorithm
+        }
 
 @dataclass
 class CertificateData:
@@ -52,35 +177,74 @@ class CertificateData:
     device_info: Dict[str, Any]
     wipe_operation: Dict[str, Any]
     verification_hashes: Dict[str, str]
-    operation_log: List[Dict[str, Any]]
+    operation_log_summary: Dict[str, Any]
     tool_info: Dict[str, str]
     compliance_info: Dict[str, str]
     signature: str = ""
     blockchain_anchor: Optional[str] = None
+    operation_log: Optional[List[Dict[str, Any]]] = None
+
+def _to_dict(cd: CertificateData) -> Dict[str, Any]:
+    """Flat dict view of a certificate; nested values are shared, not deep-copied like asdict()"""
+    return {
+        "certificate_id": cd.certificate_id,
+        "timestamp": cd.timestamp,
+        "device_info": cd.device_info,
+        "wipe_operation": cd.wipe_operation,
+        "verification_hashes": cd.verification_hashes,
+        "operation_log_summary": cd.operation_log_summary,
+        "tool_info": cd.tool_info,
+        "compliance_info": cd.compliance_info,
+        "signature": cd.signature,
+        "blockchain_anchor": cd.blockchain_anchor,
+        "operation_log": cd.operation_log
+    }
 
 class TamperProofLogger:
     def __init__(self, log_file_path: str = None):
         self.log_file_path = log_file_path or "/tmp/veriwipe_operation.log"
         self.log_chain: List[LogEntry] = []
         self.genesis_hash = "0000000000000000000000000000000000000000000000000000000000000000"
+        self._genesis_digest = bytes.fromhex(self.genesis_hash)
+        # Entries before this index are already known to chain correctly
+        self._verified_prefix_len = 0
+        self._verified_tail_digest = self._genesis_digest
+        self._integrity_ok = True
+        # New entries are appended here; differs from log_file_path only for legacy JSON-array logs
+        self._append_path = self.log_file_path
         self._load_existing_log()
+        
+        # Full walk once at load; afterwards add_entry keeps the chain valid by construction
+        self.verify_chain_integrity()
     
     def _load_existing_log(self):
-        """Load existing log file if it exists"""
+        """Load existing log file if it exists (JSONL, one entry per line)"""
         if os.path.exists(self.log_file_path):
             try:
-                with open(self.log_file_path, 'r') as f:
-                    log_data = json.load(f)
-                    for entry_data in log_data:
-                        entry = LogEntry(**entry_data)
-                        self.log_chain.append(entry)
+                with open(self.log_file_path, 'rb') as f:
+                    data = f.read()
+                
+                # Older logs were a single JSON array; it is never rewritten, new entries go to a JSONL file beside it
+                if data.lstrip().startswith(b'['):
+                    for entry_data in json.loads(data):
+                        self.log_chain.append(LogEntry(**entry_data))
+                    self._append_path = self.log_file_path + '.jsonl'
+                    if not os.path.exists(self._append_path):
+                        return
+                    with open(self._append_path, 'rb') as f:
+                        data = f.read()
+                
+                loads = orjson.loads if orjson is not None else json.loads
+                for line in data.splitlines():
+                    if line.strip():
+                        self.log_chain.append(LogEntry(**loads(line)))
             except Exception as e:
                 print(f"Warning: Could not load existing log: {e}")
     
     def add_entry(self, message: str, level: str = "INFO") -> str:
         """Add a new entry to the tamper-proof log chain"""
         timestamp = time.time()
-        entry_id = str(uuid.uuid4())
+        entry_id = _new_id()
         previous_hash = self.log_chain[-1].entry_hash if self.log_chain else self.genesis_hash
         
         entry = LogEntry(
@@ -88,30 +252,61 @@ class TamperProofLogger:
             entry_id=entry_id,
             message=message,
             level=level,
-            previous_hash=previous_hash
+            previous_hash=previous_hash,
+            hash_algorithm=_LOG_HASH
         )
         
+        # An entry built on a verified tail is valid by construction
+        if self._verified_prefix_len == len(self.log_chain):
+            self._verified_prefix_len += 1
+            self._verified_tail_digest = entry._digest
+        
         self.log_chain.append(entry)
-        self._save_log()
+        self._append_entry(entry)
         return entry_id
     
     def verify_chain_integrity(self) -> bool:
-        """Verify the integrity of the entire log chain"""
+        """Verify the integrity of the entire log chain (full audit from genesis)"""
+        self._verified_prefix_len = 0
+        self._verified_tail_digest = self._genesis_digest
+        self._integrity_ok = self._verify_unverified_entries() if self.log_chain else True
+        return self._integrity_ok
+    
+    def verify_chain_incremental(self) -> bool:
+        """Verify only what changed since the last verification"""
+        # A broken chain stays broken: entries are only ever appended
+        if not self._integrity_ok:
+            return False
         if not self.log_chain:
             return True
         
-        expected_previous = self.genesis_hash
-        for entry in self.log_chain:
-            # Check if previous hash matches
-            if entry.previous_hash != expected_previous:
+        # Fully verified chain: only the tail needs re-checking
+        if self._verified_prefix_len == len(self.log_chain):
+            tail = self.log_chain[-1]
+            return tail._digest == tail.calculate_digest()
+        
+        self._integrity_ok = self._verify_unverified_entries()
+        return self._integrity_ok
+    
+    def _verify_unverified_entries(self) -> bool:
+        """Walk the entries past the verified prefix"""
+        entries = self.log_chain[self._verified_prefix_len:]
+        
+        # Check all previous-hash links at once as a single bytes comparison
+        links = b''.join(entry._previous_digest for entry in entries)
+        expected = self._verified_tail_digest + b''.join(entry._digest for entry in entries[:-1])
+        if links != expected:
+            return False
+        
+        # Verify entry hashes (an entry hashed with an unavailable algorithm cannot be trusted)
+        for entry in entries:
+            if entry.hash_algorithm != _LEGACY_LOG_HASH and entry.hash_algorithm not in _LOG_HASHES:
                 return False
-            
-            # Verify entry hash
-            if entry.entry_hash != entry.calculate_hash():
+            if entry._digest != entry.calculate_digest():
                 return False
-            
-            expected_previous = entry.entry_hash
         
+        self._verified_prefix_len = len(self.log_chain)
+        self._verified_tail_digest = entries[-1]._digest
         return True
     
     def get_log_summary(self) -> Dict[str, Any]:
@@ -121,16 +316,23 @@ class TamperProofLogger:
             "first_entry_timestamp": self.log_chain[0].timestamp if self.log_chain else None,
             "last_entry_timestamp": self.log_chain[-1].timestamp if self.log_chain else None,
             "chain_hash": self.log_chain[-1].entry_hash if self.log_chain else self.genesis_hash,
-            "integrity_verified": self.verify_chain_integrity()
+            "integrity_verified": self.verify_chain_incremental()
         }
     
-    def _save_log(self):
-        """Save the log chain to file"""
+    def _append_entry(self, entry: LogEntry):
+        """Append a single entry to the log file"""
         try:
-            with open(self.log_file_path, 'w') as f:
-                json.dump([asdict(entry) for entry in self.log_chain], f, indent=2)
+            with open(self._append_path, 'ab') as f:
+                f.write(self._dump_entry(entry))
         except Exception as e:
             print(f"Warning: Could not save log: {e}")
+    
+    @staticmethod
+    def _dump_entry(entry: LogEntry) -> bytes:
+        """Encode one entry as a JSONL line"""
+        if orjson is not None:
+            return orjson.dumps(entry.to_dict()) + b'\n'
+        return json.dumps(entry.to_dict(), separators=(',', ':')).encode() + b'\n'
 
 class CryptographicSigner:
     def __init__(self, private_key_path: str = None, public_key_path: str = None):
@@ -138,6 +340,7 @@ class CryptographicSigner:
         self.public_key_path = public_key_path or "/opt/veriwipe/keys/public_key.pem"
         self.private_key = None
         self.public_key = None
+        self._fingerprint = None
         self._load_or_generate_keys()
     
     def _load_or_generate_keys(self):
@@ -153,17 +356,19 @@ class CryptographicSigner:
     
     def _load_keys(self):
         """Load existing cryptographic keys"""
-        with open(self.private_key_path, 'rb') as f:
-            self.private_key = load_pem_private_key(f.read(), password=None)
+        self.private_key, self.public_key = _load_keypair(
+            self.private_key_path, os.stat(self.private_key_path).st_mtime_ns,
+            self.public_key_path, os.stat(self.public_key_path).st_mtime_ns
+        )
         
-        with open(self.public_key_path, 'rb') as f:
-            self.public_key = load_pem_public_key(f.read())
+        self._fingerprint = self._compute_fingerprint()
     
     def _generate_keys(self):
-        """Generate new ECDSA key pair"""
+        """Generate new Ed25519 key pair"""
         # Generate private key
-        self.private_key = ec.generate_private_key(ec.SECP256R1())
+        self.private_key = ed25519.Ed25519PrivateKey.generate()
         self.public_key = self.private_key.public_key()
+        self._fingerprint = self._compute_fingerprint()
         
         # Ensure directory exists
         os.makedirs(os.path.dirname(self.private_key_path), exist_ok=True)
@@ -187,28 +392,40 @@ class CryptographicSigner:
         os.chmod(self.private_key_path, 0o600)
         os.chmod(self.public_key_path, 0o644)
     
-    def sign_data(self, data: str) -> str:
-        """Sign data and return base64-encoded signature"""
+    @property
+    def algorithm(self) -> str:
+        """Signature algorithm identifier recorded in certificates"""
+        if isinstance(self.public_key, ed25519.Ed25519PublicKey):
+            return "Ed25519"
+        return "ECDSA-P256-SHA256"
+    
+    def sign_data(self, data: bytes) -> bytes:
+        """Sign data and return the raw signature bytes"""
         if not self.private_key:
             raise Exception("No private key available for signing")
         
-        signature = self.private_key.sign(
-            data.encode(),
+        # Existing ECDSA keys keep working; new keys are Ed25519
+        if isinstance(self.private_key, ed25519.Ed25519PrivateKey):
+            return self.private_key.sign(data)
+        
+        return self.private_key.sign(
+            data,
             ec.ECDSA(hashes.SHA256())
         )
-        
-        return base64.b64encode(signature).decode()
     
-    def verify_signature(self, data: str, signature: str) -> bool:
-        """Verify a signature"""
+    def verify_signature(self, data: bytes, signature: bytes) -> bool:
+        """Verify a raw signature over data"""
         if not self.public_key:
             return False
         
         try:
-            signature_bytes = base64.b64decode(signature)
+            if isinstance(self.public_key, ed25519.Ed25519PublicKey):
+                self.public_key.verify(signature, data)
+                return True
+            
             self.public_key.verify(
-                signature_bytes,
-                data.encode(),
+                signature,
+                data,
                 ec.ECDSA(hashes.SHA256())
             )
             return True
@@ -219,6 +436,12 @@ class CryptographicSigner:
     
     def get_public_key_fingerprint(self) -> str:
         """Get fingerprint of public key for identification"""
+        if self._fingerprint is None:
+            self._fingerprint = self._compute_fingerprint()
+        return self._fingerprint
+    
+    def _compute_fingerprint(self) -> str:
+        """Hash the DER-encoded public key"""
         if not self.public_key:
             return ""
         
@@ -230,12 +453,15 @@ class CryptographicSigner:
         return hashlib.sha256(public_key_bytes).hexdigest()[:16]
 
 class CertificateGenerator:
-    def __init__(self, logger: TamperProofLogger = None, signer: CryptographicSigner = None):
+    def __init__(self, logger: TamperProofLogger = None, signer: CryptographicSigner = None,
+                 embed_log: bool = False):
         self.logger = logger or TamperProofLogger()
         self.signer = signer or CryptographicSigner()
+        self.embed_log = embed_log
         self.logger.add_entry("Certificate generator initialized")
     
-    def generate_certificate(self, wipe_operation: WipeOperation, output_dir: str = "/tmp") -> Dict[str, str]:
+    def generate_certificate(self, wipe_operation: WipeOperation, output_dir: str = "/tmp",
+                             pretty: bool = False) -> Dict[str, str]:
         """Generate complete certificate package (JSON + PDF)"""
         self.logger.add_entry(f"Starting certificate generation for {wipe_operation.device_info.device_path}")
         
@@ -243,11 +469,12 @@ class CertificateGenerator:
         certificate_data = self._prepare_certificate_data(wipe_operation)
         
         # Sign the certificate
-        certificate_data.signature = self._sign_certificate(certificate_data)
+        certificate_data.signature, cert_dict = self._sign_certificate(certificate_data)
         
         # Generate files
-        json_path = self._generate_json_certificate(certificate_data, output_dir)
+        json_path = self._generate_json_certificate(certificate_data, output_dir, cert_dict, pretty)
         pdf_path = self._generate_pdf_certificate(certificate_data, output_dir)
+        self._store_verification_qr(certificate_data.certificate_id)
         
         self.logger.add_entry(f"Certificate generation completed: {json_path}, {pdf_path}")
         
@@ -259,15 +486,15 @@ class CertificateGenerator:
     
     def _prepare_certificate_data(self, wipe_operation: WipeOperation) -> CertificateData:
         """Prepare certificate data structure"""
-        certificate_id = str(uuid.uuid4())
-        timestamp = datetime.now(timezone.utc).isoformat()
+        certificate_id = _new_id()
+        timestamp = _iso_timestamp(time.time_ns())
         
         # Sanitize device info (remove sensitive data, keep hashes)
         device_info = {
-            "device_path_hash": hashlib.sha256(wipe_operation.device_info.device_path.encode()).hexdigest()[:16],
+            "device_path_hash": wipe_operation.device_info.device_path_hash,
             "device_type": wipe_operation.device_info.device_type.value,
             "model": wipe_operation.device_info.model,
-            "serial_hash": hashlib.sha256(wipe_operation.device_info.serial.encode()).hexdigest()[:16],
+            "serial_hash": wipe_operation.device_info.serial_hash,
             "size_gb": wipe_operation.device_info.size_gb,
             "interface": wipe_operation.device_info.interface,
             "encryption_status": wipe_operation.device_info.encryption_status,
@@ -286,23 +513,34 @@ class CertificateGenerator:
             "error_message": wipe_operation.error_message
         }
         
-        # Convert operation log to serializable format
-        operation_log = []
-        for entry in self.logger.log_chain:
-            operation_log.append({
-                "timestamp": entry.timestamp,
-                "entry_id": entry.entry_id,
-                "message": entry.message,
-                "level": entry.level,
-                "entry_hash": entry.entry_hash
-            })
+        # The hash-linked chain is summarized by its tail; the full log stays out-of-band
+        log_chain = self.logger.log_chain
+        operation_log_summary = {
+            "entries": len(log_chain),
+            "chain_root": log_chain[-1].entry_hash if log_chain else self.logger.genesis_hash,
+            "genesis": self.logger.genesis_hash
+        }
+        
+        # Full log embedding is opt-in
+        operation_log = None
+        if self.embed_log:
+            operation_log = []
+            for entry in log_chain:
+                operation_log.append({
+                    "timestamp": entry.timestamp,
+                    "entry_id": entry.entry_id,
+                    "message": entry.message,
+                    "level": entry.level,
+                    "entry_hash": entry.entry_hash
+                })
         
         # Tool information
         tool_info = {
             "name": "VeriWipe",
             "version": "1.0.0",
             "build_hash": "development",
-            "signer_fingerprint": self.signer.get_public_key_fingerprint()
+            "signer_fingerprint": self.signer.get_public_key_fingerprint(),
+            "signature_algorithm": self.signer.algorithm
         }
         
         # Compliance information
@@ -318,31 +556,74 @@ class CertificateGenerator:
             device_info=device_info,
             wipe_operation=wipe_op_data,
             verification_hashes=wipe_operation.verification_hashes or {},
-            operation_log=operation_log,
+            operation_log_summary=operation_log_summary,
             tool_info=tool_info,
-            compliance_info=compliance_info
+            compliance_info=compliance_info,
+            operation_log=operation_log
         )
     
-    def _sign_certificate(self, certificate_data: CertificateData) -> str:
-        """Sign the certificate data"""
+    def _sign_certificate(self, certificate_data: CertificateData) -> Tuple[str, Dict[str, Any]]:
+        """Sign the certificate data, returning the signature and the signed dict"""
         # Create canonical JSON representation for signing
-        cert_dict = asdict(certificate_data)
+        cert_dict = _to_dict(certificate_data)
         cert_dict.pop('signature', None)  # Remove signature field if present
         cert_dict.pop('blockchain_anchor', None)  # Remove blockchain field if present
+        if cert_dict.get('operation_log') is None:
+            cert_dict.pop('operation_log', None)  # Only present when the full log is embedded
+        
+        # Canonical form stays on stdlib json so every verifier reproduces it byte for byte
+        canonical_json = json.dumps(cert_dict, sort_keys=True, separators=(',', ':')).encode()
+        signature = self.signer.sign_data(canonical_json)
         
-        canonical_json = json.dumps(cert_dict, sort_keys=True, separators=(',', ':'))
-        return self.signer.sign_data(canonical_json)
+        # Base64 only at certificate assembly time
+        return base64.b64encode(signature).decode(), cert_dict
     
-    def _generate_json_certificate(self, certificate_data: CertificateData, output_dir: str) -> str:
-        """Generate JSON certificate file"""
+    def _generate_json_certificate(self, certificate_data: CertificateData, output_dir: str,
+                                   cert_dict: Dict[str, Any] = None, pretty: bool = False) -> str:
+        """Generate JSON certificate file (compact unless pretty is requested)"""
         filename = f"veriwipe_certificate_{certificate_data.certificate_id}.json"
         file_path = os.path.join(output_dir, filename)
         
-        with open(file_path, 'w') as f:
-            json.dump(asdict(certificate_data), f, indent=2)
+        # Reuse the dict built for signing instead of building it again
+        if cert_dict is None:
+            cert_dict = _to_dict(certificate_data)
+        else:
+            cert_dict['signature'] = certificate_data.signature
+            cert_dict['blockchain_anchor'] = certificate_data.blockchain_anchor
+        
+        if orjson is not None:
+            option = orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS if pretty else 0
+            with open(file_path, 'wb') as f:
+                f.write(orjson.dumps(cert_dict, option=option))
+        elif pretty:
+            with open(file_path, 'w') as f:
+                json.dump(cert_dict, f, indent=2, sort_keys=True)
+        else:
+            with open(file_path, 'w') as f:
+                json.dump(cert_dict, f, separators=(',', ':'))
         
         return file_path
     
+    def _store_verification_qr(self, certificate_id: str):
+        """Render the web verifier's QR code for a new certificate into _QR_DIR, if this host has one"""
+        if not os.path.isdir(_QR_DIR):
+            return
+        
+        # Same URL and symbol parameters as the verifier's in-memory fallback
+        qr = qrcode.QRCode(version=1, box_size=10, border=5)
+        qr.add_data(_verification_url(certificate_id))
+        qr.make(fit=True)
+        
+        path = os.path.join(_QR_DIR, f"{certificate_id}.png")
+        try:
+            # Write under a private name first so the verifier never serves half a file
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                qr.make_image(fill_color="black", back_color="white").save(f, format='PNG')
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Warning: Could not store verification QR code: {e}")
+    
     def _generate_pdf_certificate(self, certificate_data: CertificateData, output_dir: str) -> str:
         """Generate PDF certificate with QR code"""
         filename = f"veriwipe_certificate_{certificate_data.certificate_id}.pdf"
@@ -350,19 +631,11 @@ class CertificateGenerator:
         
         # Create PDF document
         doc = SimpleDocTemplate(file_path, pagesize=A4)
-        styles = getSampleStyleSheet()
+        styles = _PDF_STYLES
         story = []
         
         # Title
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            spaceAfter=30,
-            alignment=TA_CENTER,
-            textColor=colors.darkblue
-        )
-        story.append(Paragraph("VeriWipe Secure Data Wiping Certificate", title_style))
+        story.append(Paragraph("VeriWipe Secure Data Wiping Certificate", _TITLE_STYLE))
         story.append(Spacer(1, 20))
         
         # Certificate ID and timestamp
@@ -379,20 +652,11 @@ class CertificateGenerator:
             ['Size', f"{certificate_data.device_info['size_gb']:.2f} GB"],
             ['Interface', certificate_data.device_info['interface']],
             ['Encryption Status', certificate_data.device_info['encryption_status']],
-            ['Secure Erase Supported', 'Yes' if certificate_data.device_info['secure_erase_supported'] else 'No']
+            ['Secure Erase Supported', {True: 'Yes', False: 'No'}.get(certificate_data.device_info['secure_erase_supported'], 'Not checked')]
         ]
         
         device_table = Table(device_data)
-        device_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 14),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        device_table.setStyle(_TABLE_STYLE)
         story.append(device_table)
         story.append(Spacer(1, 20))
         
@@ -408,28 +672,15 @@ class CertificateGenerator:
         ]
         
         wipe_table = Table(wipe_data)
-        wipe_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 14),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        wipe_table.setStyle(_TABLE_STYLE)
         story.append(wipe_table)
         story.append(Spacer(1, 20))
         
-        # QR Code for verification
-        qr_data = {
-            "certificate_id": certificate_data.certificate_id,
-            "verification_url": f"https://verify.veriwipe.org/{certificate_data.certificate_id}",
-            "signature": certificate_data.signature[:32] + "..."  # Truncated for QR
-        }
+        # QR Code for verification: just the URL, which keeps the symbol at a low version
+        verification_url = _verification_url(certificate_data.certificate_id)
         
-        qr = qrcode.QRCode(version=1, box_size=10, border=5)
-        qr.add_data(json.dumps(qr_data))
+        qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=10, border=5)
+        qr.add_data(verification_url)
         qr.make(fit=True)
         
         qr_img = qr.make_image(fill_color="black", back_color="white")
@@ -442,12 +693,8 @@ class CertificateGenerator:
         story.append(Paragraph("Scan this QR code to verify the certificate online:", styles['Normal']))
         story.append(Spacer(1, 10))
         
-        # Create temporary file for QR code
-        qr_temp_path = os.path.join(output_dir, f"qr_{certificate_data.certificate_id}.png")
-        with open(qr_temp_path, 'wb') as f:
-            f.write(qr_buffer.getvalue())
-        
-        qr_image = Image(qr_temp_path, width=2*inch, height=2*inch)
+        # reportlab reads the PNG straight from the in-memory buffer
+        qr_image = Image(qr_buffer, width=2*inch, height=2*inch)
         story.append(qr_image)
         story.append(Spacer(1, 20))
         
@@ -458,36 +705,21 @@ class CertificateGenerator:
         story.append(Spacer(1, 20))
         
         # Footer
-        footer_text = """
+        footer_text = f"""
         This certificate was generated by VeriWipe, an AI-powered secure data wiping solution.
         The digital signature ensures the authenticity and integrity of this certificate.
-        For verification, visit https://verify.veriwipe.org or scan the QR code above.
+        For verification, visit {verification_url} or scan the QR code above.
         """
         story.append(Paragraph(footer_text, styles['Normal']))
         
         # Build PDF
         doc.build(story)
         
-        # Clean up temporary QR code file
-        try:
-            os.remove(qr_temp_path)
-        except:
-            pass
-        
         return file_path
     
     def _get_nist_classification(self, wipe_method) -> str:
         """Get NIST SP 800-88 classification for wipe method"""
-        classifications = {
-            "ata_secure_erase": "Purge",
-            "nvme_secure_erase": "Purge", 
-            "nvme_crypto_erase": "Purge",
-            "crypto_erase": "Purge",
-            "multipass_overwrite": "Purge",
-            "single_pass_random": "Clear",
-            "factory_reset": "Clear"
-        }
-        return classifications.get(wipe_method.value, "Unknown")
+        return _nist_for(wipe_method.value)
     
     def verify_certificate(self, certificate_path: str) -> Dict[str, Any]:
         """Verify a certificate's authenticity and integrity"""
@@ -500,10 +732,10 @@ class CertificateGenerator:
             blockchain_anchor = cert_data.pop('blockchain_anchor', None)
             
             # Recreate canonical JSON
-            canonical_json = json.dumps(cert_data, sort_keys=True, separators=(',', ':'))
+            canonical_json = json.dumps(cert_data, sort_keys=True, separators=(',', ':')).encode()
             
             # Verify signature
-            signature_valid = self.signer.verify_signature(canonical_json, signature)
+            signature_valid = self.signer.verify_signature(canonical_json, base64.b64decode(signature))
             
             return {
                 "valid": signature_valid,
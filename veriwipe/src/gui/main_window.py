@@ -7,105 +7,193 @@ import sys
 import os
 import threading
 import time
-from typing import Dict, List, Optional
+import weakref
+from collections import deque
+from functools import lru_cache
+from operator import attrgetter
+from typing import TYPE_CHECKING, Dict, List, Optional
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, 
-                            QWidget, QPushButton, QLabel, QProgressBar, QTextEdit,
+                            QWidget, QPushButton, QLabel, QProgressBar, QPlainTextEdit,
                             QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox,
                             QDialog, QDialogButtonBox, QCheckBox, QGroupBox, QFrame,
                             QScrollArea, QSplitter)
-from PyQt5.QtCore import QThread, pyqtSignal, Qt, QTimer
-from PyQt5.QtGui import QFont, QPixmap, QPalette, QColor, QIcon
+from PyQt5.QtCore import (QMetaObject, QObject, QRunnable, QSignalBlocker, QThread, QThreadPool,
+                          pyqtSignal, pyqtSlot, Qt, QTimer)
+from PyQt5.QtGui import QFont, QFontMetrics, QPainter, QPixmap, QPixmapCache
 
-# Import our core modules
+# Import our core modules (only the lightweight device types at module load)
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from ai_engine.ai_wipe_engine import AIWipeEngine, DeviceInfo, DeviceType
-from wipe_core.wipe_engine import WipeCore, WipeOperation, WipeStatus
-from certificate_engine.certificate_generator import CertificateGenerator, TamperProofLogger
+from ai_engine.ai_wipe_engine import DeviceInfo, DeviceType
 
-class DeviceDetectionThread(QThread):
+if TYPE_CHECKING:
+    from certificate_engine.certificate_generator import TamperProofLogger
+
+# Per-type display constants, built once at import
+_DEVICE_ICONS = {
+    DeviceType.HDD: "💾",
+    DeviceType.SSD_SATA: "💿",
+    DeviceType.SSD_NVME: "⚡",
+    DeviceType.EMMC: "📱",
+    DeviceType.USB: "🔌",
+    DeviceType.UNKNOWN: "❓"
+}
+_TYPE_PRETTY = {dt: dt.value.replace('_', ' ').title() for dt in DeviceType}
+
+def _device_pixmap(device_type: DeviceType) -> QPixmap:
+    """Device-type emoji rendered once into a pixmap and kept in QPixmapCache"""
+    key = f"veriwipe-device-{device_type.name}"
+    pixmap = QPixmapCache.find(key)
+    if pixmap is None:
+        text = _DEVICE_ICONS.get(device_type, "❓")
+        font = QFont("Arial", 24)
+        metrics = QFontMetrics(font)
+        pixmap = QPixmap(metrics.horizontalAdvance(text) + 4, metrics.height())
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
+        painter.setFont(font)
+        painter.drawText(pixmap.rect(), Qt.AlignCenter, text)
+        painter.end()
+        QPixmapCache.insert(key, pixmap)
+    return pixmap
+
+@lru_cache(maxsize=256)
+def _format_log_time(seconds: int) -> str:
+    """Local-time display string for an epoch second; log bursts share a second"""
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(seconds))
+
+@lru_cache(maxsize=None)
+def _load_engines():
+    """Import the engine modules once, when the main window is first built"""
+    from ai_engine.ai_wipe_engine import AIWipeEngine
+    from wipe_core.wipe_engine import WipeCore
+    from certificate_engine.certificate_generator import CertificateGenerator, TamperProofLogger
+    return AIWipeEngine, WipeCore, CertificateGenerator, TamperProofLogger
+
+class DetectionSignals(QObject):
+    # QRunnable is not a QObject, so its signals live here
     devices_detected = pyqtSignal(list)
     detection_error = pyqtSignal(str)
-    
+    finished = pyqtSignal()
+
+class DeviceDetectionRunnable(QRunnable):
     def __init__(self, ai_engine):
         super().__init__()
         self.ai_engine = ai_engine
+        self.signals = DetectionSignals()
     
     def run(self):
         try:
             devices = self.ai_engine.detect_devices()
-            self.devices_detected.emit(devices)
+            self.signals.devices_detected.emit(devices)
         except Exception as e:
-            self.detection_error.emit(str(e))
+            self.signals.detection_error.emit(str(e))
+        finally:
+            self.signals.finished.emit()
 
-class WipeThread(QThread):
+class WipeSignals(QObject):
     progress_updated = pyqtSignal(str, float, str)  # device_path, progress, message
     wipe_completed = pyqtSignal(str, bool, str)     # device_path, success, message
-    
-    def __init__(self, wipe_core, device_path):
+
+class WipeRunnable(QRunnable):
+    def __init__(self, wipe_core, device_path, cancel_event: threading.Event):
         super().__init__()
         self.wipe_core = wipe_core
         self.device_path = device_path
-        self.is_cancelled = False
+        self.cancel_event = cancel_event
+        self.signals = WipeSignals()
     
     def run(self):
         try:
             success = self.wipe_core.execute_wipe(self.device_path)
-            if not self.is_cancelled:
+            if not self.cancel_event.is_set():
                 message = "Wipe completed successfully" if success else "Wipe failed"
-                self.wipe_completed.emit(self.device_path, success, message)
+                self.signals.wipe_completed.emit(self.device_path, success, message)
         except Exception as e:
-            self.wipe_completed.emit(self.device_path, False, str(e))
-    
-    def cancel(self):
-        self.is_cancelled = True
+            self.signals.wipe_completed.emit(self.device_path, False, str(e))
 
 class DeviceWidget(QFrame):
     wipe_requested = pyqtSignal(str)  # device_path
     
+    # Stylesheets are installed once on the QApplication (see main()) so Qt parses them once
+    _FRAME_QSS = """
+        DeviceWidget, DeviceWidget QFrame {
+            background-color: #f0f0f0;
+            border: 2px solid #ccc;
+            border-radius: 10px;
+            margin: 5px;
+            padding: 10px;
+        }
+    """
+    _BTN_RED_QSS = """
+        DeviceWidget QPushButton#wipeBtn {
+            background-color: #ff4444;
+            color: white;
+            border: none;
+            border-radius: 5px;
+            padding: 10px 20px;
+            font-size: 14px;
+            font-weight: bold;
+        }
+        DeviceWidget QPushButton#wipeBtn:hover {
+            background-color: #cc3333;
+        }
+        DeviceWidget QPushButton#wipeBtn:disabled {
+            background-color: #cccccc;
+        }
+    """
+    _BTN_GREEN_QSS = """
+        DeviceWidget QPushButton#wipeBtn[wiped="true"] {
+            background-color: #009900;
+        }
+    """
+    STYLESHEET = _FRAME_QSS + _BTN_RED_QSS + _BTN_GREEN_QSS
+    
+    # Label formats, filled with %-formatting from one attribute fetch
+    _FIELDS = attrgetter('model', 'device_path', 'size_gb', 'interface', 'serial')
+    _FMT_NAME = "<b>%s</b>"
+    _FMT_PATH = "Path: %s"
+    _FMT_SIZE = "Size: %.2f GB"
+    _FMT_INTERFACE = "Interface: %s"
+    _FMT_SERIAL = "Serial: %s..."
+    
     def __init__(self, device_info: DeviceInfo, parent=None):
         super().__init__(parent)
         self.device_info = device_info
+        
+        # Latest progress from the wipe worker; at most one queued flush is outstanding
+        self._pending_progress = deque(maxlen=1)
+        self._flush_scheduled = False
         self.setup_ui()
     
     def setup_ui(self):
         self.setFrameStyle(QFrame.Box)
         self.setLineWidth(2)
-        self.setStyleSheet("""
-            QFrame {
-                background-color: #f0f0f0;
-                border: 2px solid #ccc;
-                border-radius: 10px;
-                margin: 5px;
-                padding: 10px;
-            }
-        """)
+        model, device_path, size_gb, interface, serial = self._FIELDS(self.device_info)
         
         layout = QVBoxLayout()
         
         # Device header
         header_layout = QHBoxLayout()
         
-        # Device icon based on type
+        # Device icon based on type (pre-rendered, so no emoji font lookup per widget)
         icon_label = QLabel()
-        icon_text = self._get_device_icon()
-        icon_label.setText(icon_text)
-        icon_label.setFont(QFont("Arial", 24))
+        icon_label.setPixmap(_device_pixmap(self.device_info.device_type))
         header_layout.addWidget(icon_label)
         
         # Device info
         info_layout = QVBoxLayout()
         
-        name_label = QLabel(f"<b>{self.device_info.model}</b>")
+        name_label = QLabel(self._FMT_NAME % model)
         name_label.setFont(QFont("Arial", 12, QFont.Bold))
         info_layout.addWidget(name_label)
         
-        path_label = QLabel(f"Path: {self.device_info.device_path}")
+        path_label = QLabel(self._FMT_PATH % device_path)
         info_layout.addWidget(path_label)
         
-        size_label = QLabel(f"Size: {self.device_info.size_gb:.2f} GB")
+        size_label = QLabel(self._FMT_SIZE % size_gb)
         info_layout.addWidget(size_label)
         
-        type_label = QLabel(f"Type: {self.device_info.device_type.value.replace('_', ' ').title()}")
+        type_label = QLabel("Type: " + _TYPE_PRETTY[self.device_info.device_type])
         info_layout.addWidget(type_label)
         
         header_layout.addLayout(info_layout)
@@ -113,23 +201,7 @@ class DeviceWidget(QFrame):
         
         # Wipe button
         self.wipe_button = QPushButton("🗑️ Secure Wipe")
-        self.wipe_button.setStyleSheet("""
-            QPushButton {
-                background-color: #ff4444;
-                color: white;
-                border: none;
-                border-radius: 5px;
-                padding: 10px 20px;
-                font-size: 14px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #cc3333;
-            }
-            QPushButton:disabled {
-                background-color: #cccccc;
-            }
-        """)
+        self.wipe_button.setObjectName("wipeBtn")
         self.wipe_button.clicked.connect(self._on_wipe_clicked)
         header_layout.addWidget(self.wipe_button)
         
@@ -139,14 +211,17 @@ class DeviceWidget(QFrame):
         details_layout = QHBoxLayout()
         
         left_details = QVBoxLayout()
-        left_details.addWidget(QLabel(f"Interface: {self.device_info.interface}"))
-        left_details.addWidget(QLabel(f"Serial: {self.device_info.serial[:16]}..."))
+        left_details.addWidget(QLabel(self._FMT_INTERFACE % interface))
+        left_details.addWidget(QLabel(self._FMT_SERIAL % serial[:16]))
         details_layout.addLayout(left_details)
         
         right_details = QVBoxLayout()
         encryption_text = "🔒 Encrypted" if self.device_info.encryption_status != "None" else "🔓 Not Encrypted"
         right_details.addWidget(QLabel(encryption_text))
-        secure_erase_text = "✅ Secure Erase" if self.device_info.secure_erase_supported else "❌ No Secure Erase"
+        if self.device_info.secure_erase_supported is None:
+            secure_erase_text = "➖ Secure Erase not checked"
+        else:
+            secure_erase_text = "✅ Secure Erase" if self.device_info.secure_erase_supported else "❌ No Secure Erase"
         right_details.addWidget(QLabel(secure_erase_text))
         details_layout.addLayout(right_details)
         
@@ -164,17 +239,6 @@ class DeviceWidget(QFrame):
         
         self.setLayout(layout)
     
-    def _get_device_icon(self) -> str:
-        icons = {
-            DeviceType.HDD: "💾",
-            DeviceType.SSD_SATA: "💿",
-            DeviceType.SSD_NVME: "⚡",
-            DeviceType.EMMC: "📱",
-            DeviceType.USB: "🔌",
-            DeviceType.UNKNOWN: "❓"
-        }
-        return icons.get(self.device_info.device_type, "❓")
-    
     def _on_wipe_clicked(self):
         # Show confirmation dialog
         reply = QMessageBox.question(self, 'Confirm Secure Wipe',
@@ -199,8 +263,30 @@ class DeviceWidget(QFrame):
             self.status_label.setText("Ready for wiping")
             self.status_label.setStyleSheet("color: #666;")
     
+    def _dispatch_progress(self, device_path: str, progress: float, message: str):
+        # Runs on the wipe worker thread, registered directly with WipeCore
+        if device_path != self.device_info.device_path:
+            return
+        self._pending_progress.append((progress, message))
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            QMetaObject.invokeMethod(self, "_flush_progress", Qt.QueuedConnection)
+    
+    @pyqtSlot()
+    def _flush_progress(self):
+        # Clear the flag before popping so an update racing with us schedules another flush
+        self._flush_scheduled = False
+        try:
+            progress, message = self._pending_progress.pop()
+        except IndexError:
+            return
+        self.update_progress(progress, message)
+    
     def update_progress(self, progress: float, message: str):
-        self.progress_bar.setValue(int(progress))
+        # Skip Qt's change signal and repaint when the percent hasn't moved
+        percent = int(progress)
+        if percent != self.progress_bar.value():
+            self.progress_bar.setValue(percent)
         self.status_label.setText(message)
     
     def set_completed_state(self, success: bool, message: str):
@@ -209,37 +295,32 @@ class DeviceWidget(QFrame):
             self.status_label.setText("✅ " + message)
             self.status_label.setStyleSheet("color: #009900;")
             self.wipe_button.setText("✅ Wiped")
-            self.wipe_button.setStyleSheet("""
-                QPushButton {
-                    background-color: #009900;
-                    color: white;
-                    border: none;
-                    border-radius: 5px;
-                    padding: 10px 20px;
-                    font-size: 14px;
-                    font-weight: bold;
-                }
-            """)
+            # Switch to the green rule; re-polish so the property selector is re-evaluated
+            self.wipe_button.setProperty("wiped", True)
+            self.wipe_button.style().unpolish(self.wipe_button)
+            self.wipe_button.style().polish(self.wipe_button)
             self.wipe_button.setEnabled(False)
         else:
             self.status_label.setText("❌ " + message)
             self.status_label.setStyleSheet("color: #cc0000;")
 
 class LogViewerDialog(QDialog):
-    def __init__(self, logger: TamperProofLogger, parent=None):
+    def __init__(self, logger: 'TamperProofLogger', parent=None):
         super().__init__(parent)
         self.logger = logger
         self.setWindowTitle("Operation Logs")
         self.setModal(True)
         self.resize(800, 600)
+        self._last_rendered_len = 0
         self.setup_ui()
     
     def setup_ui(self):
         layout = QVBoxLayout()
         
         # Log text area
-        self.log_text = QTextEdit()
+        self.log_text = QPlainTextEdit()
         self.log_text.setReadOnly(True)
+        self.log_text.setMaximumBlockCount(10000)
         self.log_text.setFont(QFont("Courier", 10))
         
         # Populate logs
@@ -266,33 +347,63 @@ class LogViewerDialog(QDialog):
         self.setLayout(layout)
     
     def refresh_logs(self):
-        log_text = ""
-        for entry in self.logger.log_chain:
-            timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry.timestamp))
-            log_text += f"[{timestamp}] {entry.level}: {entry.message}\\n"
-            log_text += f"  Entry ID: {entry.entry_id}\\n"
-            log_text += f"  Hash: {entry.entry_hash[:16]}...\\n\\n"
+        # Only entries added since the last refresh are formatted and appended
+        new_entries = self.logger.log_chain[self._last_rendered_len:]
+        if not new_entries:
+            return
         
-        self.log_text.setPlainText(log_text)
+        parts = []
+        append = parts.append
+        format_time = _format_log_time
+        for entry in new_entries:
+            append(f"[{format_time(int(entry.timestamp))}] {entry.level}: {entry.message}\n"
+                   f"  Entry ID: {entry.entry_id}\n"
+                   f"  Hash: {entry.entry_hash[:16]}...\n\n")
+        
+        # appendPlainText starts a new block, so the separating blank line is prepended
+        text = "".join(parts).rstrip("\n")
+        if self._last_rendered_len == 0:
+            self.log_text.setPlainText(text)
+        else:
+            self.log_text.appendPlainText("\n" + text)
+        self._last_rendered_len += len(new_entries)
     
     def verify_chain(self):
-        is_valid = self.logger.verify_chain_integrity()
+        is_valid = self.logger.verify_chain_incremental()
         if is_valid:
             QMessageBox.information(self, "Chain Verification", "✅ Log chain integrity verified successfully!")
         else:
             QMessageBox.warning(self, "Chain Verification", "❌ Log chain integrity verification failed!")
 
 class VeriWipeMainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, embed_log: bool = False):
         super().__init__()
+        AIWipeEngine, WipeCore, CertificateGenerator, TamperProofLogger = _load_engines()
         self.ai_engine = AIWipeEngine()
         self.wipe_core = WipeCore(self.ai_engine)
         self.logger = TamperProofLogger()
-        self.cert_generator = CertificateGenerator(self.logger)
+        self.cert_generator = CertificateGenerator(self.logger, embed_log=embed_log)
         
-        self.devices: List[DeviceInfo] = []
+        self.devices_by_path: Dict[str, DeviceInfo] = {}
         self.device_widgets: Dict[str, DeviceWidget] = {}
-        self.wipe_threads: Dict[str, WipeThread] = {}
+        
+        # Wipes and detection run on a shared pool; the event suppresses results after close
+        self.pool = QThreadPool.globalInstance()
+        self.pool.setMaxThreadCount(max(2, QThread.idealThreadCount() - 1))
+        self.cancel_event = threading.Event()
+        
+        # In-flight wipes; entries vanish on their own once the pool deletes the runnable
+        self.wipe_threads = weakref.WeakValueDictionary()
+        
+        # Device widgets receive their own progress; the status bar is coalesced here at 20 Hz
+        self._last_progress_pct: Dict[str, int] = {}
+        # One single-slot deque per device: appends and pops are atomic, so no lock is needed
+        self._pending_progress: Dict[str, deque] = {}
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(False)
+        self._flush_timer.setInterval(50)
+        self._flush_timer.timeout.connect(self._flush_progress)
+        self._flush_timer.start()
         
         # Set up progress callback
         self.wipe_core.add_progress_callback(self.on_wipe_progress)
@@ -383,42 +494,71 @@ class VeriWipeMainWindow(QMainWindow):
         self.status_label.setText("🔍 Detecting storage devices...")
         self.detect_btn.setEnabled(False)
         
-        self.detection_thread = DeviceDetectionThread(self.ai_engine)
-        self.detection_thread.devices_detected.connect(self.on_devices_detected)
-        self.detection_thread.detection_error.connect(self.on_detection_error)
-        self.detection_thread.finished.connect(lambda: self.detect_btn.setEnabled(True))
-        self.detection_thread.start()
+        detection = DeviceDetectionRunnable(self.ai_engine)
+        detection.signals.devices_detected.connect(self.on_devices_detected)
+        detection.signals.detection_error.connect(self.on_detection_error)
+        detection.signals.finished.connect(self._enable_detect)
+        self.pool.start(detection)
         
         self.logger.add_entry("Device detection started")
     
+    def _enable_detect(self):
+        self.detect_btn.setEnabled(True)
+    
     def on_devices_detected(self, devices: List[DeviceInfo]):
-        self.devices = devices
+        self.devices_by_path = {d.device_path: d for d in devices}
         self.logger.add_entry(f"Detected {len(devices)} storage devices")
         
-        # Clear existing device widgets
-        for widget in self.device_widgets.values():
-            widget.setParent(None)
-        self.device_widgets.clear()
+        # Batch all widget changes into a single layout pass
+        self.device_container.setUpdatesEnabled(False)
+        self.device_layout.setEnabled(False)
+        try:
+            self._update_device_widgets(devices)
+        finally:
+            self.device_layout.setEnabled(True)
+            self.device_container.setUpdatesEnabled(True)
         
         if not devices:
             self.status_label.setText("❌ No storage devices detected")
+            return
+        
+        self.status_label.setText(f"✅ Detected {len(devices)} device(s)")
+        self.statusBar().showMessage(f"Ready - {len(devices)} devices available for wiping")
+    
+    def _update_device_widgets(self, devices: List[DeviceInfo]):
+        # Keep widgets for devices that are still present; only the diff is rebuilt
+        current_paths = {device.device_path for device in devices}
+        with QSignalBlocker(self.device_container):
+            for path in [path for path in self.device_widgets if path not in current_paths]:
+                self.wipe_core.remove_progress_callback(self.device_widgets.pop(path)._dispatch_progress)
+            
+            # Take out stale widgets, the placeholder label and the trailing stretch
+            kept = set(self.device_widgets.values())
+            for i in reversed(range(self.device_layout.count())):
+                widget = self.device_layout.itemAt(i).widget()
+                if widget is None or widget not in kept:
+                    self.device_layout.takeAt(i)
+                    if widget is not None:
+                        widget.deleteLater()
+        self.device_scroll.viewport().update()
+        
+        if not devices:
             no_devices_label = QLabel("No storage devices detected.\\nMake sure you have appropriate permissions and devices are connected.")
             no_devices_label.setAlignment(Qt.AlignCenter)
             no_devices_label.setStyleSheet("color: #666; font-size: 14px; margin: 50px;")
             self.device_layout.addWidget(no_devices_label)
             return
         
-        self.status_label.setText(f"✅ Detected {len(devices)} device(s)")
-        
-        # Create device widgets
+        # Create widgets for new devices
         for device in devices:
+            if device.device_path in self.device_widgets:
+                continue
             widget = DeviceWidget(device)
             widget.wipe_requested.connect(self.start_wipe_operation)
             self.device_widgets[device.device_path] = widget
             self.device_layout.addWidget(widget)
         
         self.device_layout.addStretch()
-        self.statusBar().showMessage(f"Ready - {len(devices)} devices available for wiping")
     
     def on_detection_error(self, error_message: str):
         self.status_label.setText("❌ Detection failed")
@@ -426,8 +566,8 @@ class VeriWipeMainWindow(QMainWindow):
         QMessageBox.critical(self, "Detection Error", f"Failed to detect devices:\\n{error_message}")
     
     def start_wipe_operation(self, device_path: str):
-        device_info = next((d for d in self.devices if d.device_path == device_path), None)
-        if not device_info:
+        device_info = self.devices_by_path.get(device_path)
+        if not device_info or device_path in self.wipe_threads:
             return
         
         self.logger.add_entry(f"Starting wipe operation for {device_path}")
@@ -438,31 +578,48 @@ class VeriWipeMainWindow(QMainWindow):
         # Update UI
         widget = self.device_widgets[device_path]
         widget.set_wiping_state(True)
+        self.wipe_core.add_progress_callback(widget._dispatch_progress)
         
-        # Start wipe thread
-        wipe_thread = WipeThread(self.wipe_core, device_path)
-        wipe_thread.wipe_completed.connect(self.on_wipe_completed)
-        self.wipe_threads[device_path] = wipe_thread
-        wipe_thread.start()
+        # Start wipe on the pool
+        runnable = WipeRunnable(self.wipe_core, device_path, self.cancel_event)
+        runnable.signals.wipe_completed.connect(self.on_wipe_completed)
+        self.wipe_threads[device_path] = runnable
+        self.pool.start(runnable)
         
         self.statusBar().showMessage(f"Wiping {device_path}...")
     
     def on_wipe_progress(self, device_path: str, progress: float, message: str):
-        if device_path in self.device_widgets:
-            self.device_widgets[device_path].update_progress(progress, message)
-        
-        self.statusBar().showMessage(f"{device_path}: {progress:.1f}% - {message}")
+        # Runs on the wipe worker thread: only record the latest update
+        slot = self._pending_progress.get(device_path)
+        if slot is None:
+            slot = self._pending_progress.setdefault(device_path, deque(maxlen=1))
+        slot.append((progress, message))
+    
+    def _flush_progress(self):
+        for device_path, slot in list(self._pending_progress.items()):
+            try:
+                progress, message = slot.pop()
+            except IndexError:
+                continue
+            
+            # Device was removed from the view; nothing to show
+            if device_path not in self.device_widgets:
+                continue
+            
+            # Only rewrite the status bar when the integer percent changed
+            percent = int(progress)
+            if percent != self._last_progress_pct.get(device_path, -1):
+                self._last_progress_pct[device_path] = percent
+                self.statusBar().showMessage(f"{device_path}: {progress:.1f}% - {message}")
     
     def on_wipe_completed(self, device_path: str, success: bool, message: str):
         self.logger.add_entry(f"Wipe operation for {device_path} completed: {'success' if success else 'failed'}")
         
         # Update UI
-        if device_path in self.device_widgets:
-            self.device_widgets[device_path].set_completed_state(success, message)
-        
-        # Clean up thread
-        if device_path in self.wipe_threads:
-            del self.wipe_threads[device_path]
+        widget = self.device_widgets.get(device_path)
+        if widget is not None:
+            self.wipe_core.remove_progress_callback(widget._dispatch_progress)
+            widget.set_completed_state(success, message)
         
         if success:
             # Generate certificate
@@ -486,6 +643,10 @@ class VeriWipeMainWindow(QMainWindow):
         
         self.statusBar().showMessage("Ready")
     
+    def closeEvent(self, event):
+        self.cancel_event.set()
+        super().closeEvent(event)
+    
     def show_logs(self):
         dialog = LogViewerDialog(self.logger, self)
         dialog.exec_()
@@ -514,7 +675,7 @@ class VeriWipeMainWindow(QMainWindow):
         
         QMessageBox.about(self, "About VeriWipe", about_text)
 
-def main():
+def main(embed_log: bool = False):
     app = QApplication(sys.argv)
     
     # Set application properties
@@ -524,8 +685,9 @@ def main():
     
     # Apply dark theme
     app.setStyle('Fusion')
+    app.setStyleSheet(DeviceWidget.STYLESHEET)
     
-    window = VeriWipeMainWindow()
+    window = VeriWipeMainWindow(embed_log)
     window.show()
     
     sys.exit(app.exec_())
@@ -6,12 +6,94 @@ Automatically detects, installs, and fixes dependencies with AI-powered diagnost
 
 import os
 import sys
+import site
+import hashlib
+import time
+import shutil
 import subprocess
 import importlib
+import importlib.machinery
+import importlib.util
 import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Tuple, Dict, Optional
 
+# Effective UID can't change under us; os.geteuid is absent on Windows
+_IS_ROOT = hasattr(os, 'geteuid') and os.geteuid() == 0
+
+# Check command -> apt package providing it
+_REQUIRED_SYSTEM_PACKAGES = {
+    'python3': 'python3',
+    'pip3': 'python3-pip',
+    'PyQt5': 'python3-pyqt5',
+    'libssl': 'libssl-dev',
+    'libffi': 'libffi-dev',
+    'hdparm': 'hdparm',
+    'nvme': 'nvme-cli',
+    'smartctl': 'smartmontools'
+}
+
+# Display name -> import name for the required Python modules
+_REQUIRED_PYTHON_MODULES = {
+    'PyQt5': 'PyQt5',
+    'cryptography': 'cryptography',
+    'reportlab': 'reportlab',
+    'qrcode': 'qrcode',
+    'sklearn': 'sklearn',
+    'numpy': 'numpy',
+    'scipy': 'scipy',
+    'psutil': 'psutil',
+    'flask': 'flask'
+}
+
+# Display name -> pip requirement used by auto-fix
+_PYTHON_PACKAGE_SPECS = {
+    'PyQt5': 'PyQt5>=5.15.4',
+    'cryptography': 'cryptography>=3.4.8',
+    'reportlab': 'reportlab>=3.6.0',
+    'qrcode': 'qrcode[pil]>=7.3.1',
+    'sklearn': 'scikit-learn>=1.0.0',
+    'numpy': 'numpy>=1.21.0',
+    'scipy': 'scipy>=1.7.0',
+    'psutil': 'psutil>=5.8.0',
+    'flask': 'flask>=2.0.0'
+}
+
+# dpkg's package database, read directly to avoid spawning dpkg-query
+_DPKG_STATUS = '/var/lib/dpkg/status'
+
+# apt's binary package cache; its mtime tells us when the index was last refreshed
+_APT_PKGCACHE = '/var/cache/apt/pkgcache.bin'
+
+# System checks answered by the dpkg database rather than an executable on PATH
+_DPKG_CHECKS = frozenset({'PyQt5', 'libssl', 'libffi'})
+_DPKG_PACKAGES = [pkg for cmd, pkg in _REQUIRED_SYSTEM_PACKAGES.items() if cmd in _DPKG_CHECKS]
+
+# Last successful verdict, stored as a fingerprint of everything the check looked at
+_DEPS_STAMP = Path.home() / '.cache' / 'veriwipe' / 'deps.stamp'
+
+def _dependency_stamp_key() -> str:
+    """Fingerprint the interpreter, import path, site-packages, dpkg database and PATH"""
+    parts = [sys.executable, sys.version, os.environ.get('PATH', ''), *sys.path]
+    # Installing or removing a package changes the mtime of its site-packages or of the dpkg status file
+    for path in (*site.getsitepackages(), site.getusersitepackages(), _DPKG_STATUS):
+        try:
+            parts.append(f"{path}:{os.stat(path).st_mtime_ns}")
+        except OSError:
+            parts.append(f"{path}:-")
+    return hashlib.blake2b('\0'.join(parts).encode(), digest_size=16).hexdigest()
+
+@lru_cache(maxsize=256)
+def _module_available(import_name: str, search_paths: Tuple[str, ...]) -> bool:
+    """Resolve a module on a sys.path snapshot without executing it"""
+    if importlib.machinery.PathFinder.find_spec(import_name, list(search_paths)) is not None:
+        return True
+    # Fall back to the full meta path for built-ins and editable installs
+    return importlib.util.find_spec(import_name) is not None
+
 class SmartDependencyManager:
     """AI-powered dependency manager that automatically fixes missing packages"""
     
@@ -20,93 +102,129 @@ class SmartDependencyManager:
         self.missing_system_packages = []
         self.missing_python_packages = []
         self.installation_log = []
+        self._cache: Optional[bool] = None
+        self._search_paths = tuple(sys.path)
+        self._installed_set: Optional[set] = None
         
-    def check_all_dependencies(self) -> bool:
+    def check_all_dependencies(self, early_exit: bool = False) -> bool:
         """Comprehensive dependency check with auto-fix capability"""
+        if self._cache is None:
+            self._cache = self._run_dependency_check(early_exit)
+        return self._cache
+    
+    def _run_dependency_check(self, early_exit: bool = False) -> bool:
+        """Probe all dependencies and auto-fix them when possible"""
         self.logger.info("🔍 Starting smart dependency analysis...")
         
-        # Check system dependencies
-        system_ok = self._check_system_dependencies()
+        # Without root nothing can be fixed, so a verdict-only caller can stop at the first miss
+        if early_exit and not _IS_ROOT:
+            if (self._check_system_dependencies(early_exit=True)
+                    and self._check_python_dependencies(early_exit=True)):
+                self.logger.info("✅ All dependencies satisfied!")
+                return True
+            self.logger.error("❌ Missing dependencies detected. Run with --auto-fix as root.")
+            return False
         
-        # Check Python dependencies  
-        python_ok = self._check_python_dependencies()
+        # System and Python checks are independent, so run them side by side
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            system_future = executor.submit(self._check_system_dependencies)
+            python_future = executor.submit(self._check_python_dependencies)
+            system_ok = system_future.result()
+            python_ok = python_future.result()
         
         if system_ok and python_ok:
             self.logger.info("✅ All dependencies satisfied!")
             return True
         
         # Attempt auto-fix if running with proper privileges
-        if os.geteuid() == 0:  # Running as root
+        if _IS_ROOT:
             return self._auto_fix_dependencies()
         else:
             self._show_fix_instructions()
             return False
     
-    def _check_system_dependencies(self) -> bool:
+    def _check_system_dependencies(self, early_exit: bool = False) -> bool:
         """Check for required system packages"""
         self.logger.info("Checking system dependencies...")
         
-        required_packages = {
-            'python3': 'python3',
-            'pip3': 'python3-pip',
-            'PyQt5': 'python3-pyqt5',
-            'libssl': 'libssl-dev',
-            'libffi': 'libffi-dev',
-            'hdparm': 'hdparm',
-            'nvme-cli': 'nvme-cli',
-            'smartctl': 'smartmontools'
-        }
+        # One dpkg-query call covers every library package
+        installed = self._query_installed_packages(_DPKG_PACKAGES)
         
         missing = []
-        for check_cmd, package_name in required_packages.items():
-            if not self._check_system_package(check_cmd):
+        for check_cmd, package_name in _REQUIRED_SYSTEM_PACKAGES.items():
+            if check_cmd in _DPKG_CHECKS:
+                found = package_name in installed
+            else:
+                found = self._check_system_package(check_cmd)
+            if not found:
                 missing.append(package_name)
+                if early_exit:
+                    break
         
         self.missing_system_packages = missing
         return len(missing) == 0
     
-    def _check_python_dependencies(self) -> bool:
+    def _check_python_dependencies(self, early_exit: bool = False) -> bool:
         """Check for required Python packages"""
         self.logger.info("Checking Python dependencies...")
         
-        required_modules = [
-            'PyQt5', 'cryptography', 'reportlab', 'qrcode', 
-            'sklearn', 'numpy', 'scipy', 'psutil', 'flask'
-        ]
-        
         missing = []
-        for module in required_modules:
-            try:
-                importlib.import_module(module.lower() if module == 'PyQt5' else module)
-                self.logger.debug(f"✅ {module}: OK")
-            except ImportError:
+        for module, import_name in _REQUIRED_PYTHON_MODULES.items():
+            if _module_available(import_name, self._search_paths):
+                self.logger.debug("✅ %s: OK", module)
+            else:
                 missing.append(module)
-                self.logger.debug(f"❌ {module}: Missing")
+                self.logger.debug("❌ %s: Missing", module)
+                if early_exit:
+                    break
         
         self.missing_python_packages = missing
         return len(missing) == 0
     
-    def _check_system_package(self, command: str) -> bool:
-        """Check if a system command/package is available"""
+    def _load_dpkg_installed_set(self) -> Optional[set]:
+        """Parse the dpkg status database into a set of installed package names"""
+        if self._installed_set is None:
+            installed = set()
+            package = None
+            try:
+                with open(_DPKG_STATUS, encoding='utf-8', errors='replace') as f:
+                    for line in f:
+                        if line.startswith('Package:'):
+                            package = line[8:].strip()
+                        elif line.startswith('Status:') and line.rstrip().endswith(' installed'):
+                            installed.add(package)
+            except OSError:
+                return None
+            self._installed_set = installed
+        return self._installed_set
+    
+    def _query_installed_packages(self, packages: List[str]) -> set:
+        """Return the subset of packages dpkg reports as installed"""
+        if not packages:
+            return set()
+        
+        installed = self._load_dpkg_installed_set()
+        if installed is not None:
+            return installed.intersection(packages)
+        
+        # Status file unreadable, ask dpkg-query instead
         try:
-            if command == 'PyQt5':
-                # Special check for PyQt5 system package
-                result = subprocess.run(['dpkg', '-l', 'python3-pyqt5'], 
-                                      capture_output=True, text=True)
-                return result.returncode == 0
-            elif command in ['libssl', 'libffi']:
-                # Check for development libraries
-                lib_name = 'libssl-dev' if command == 'libssl' else 'libffi-dev'
-                result = subprocess.run(['dpkg', '-l', lib_name], 
-                                      capture_output=True, text=True)
-                return result.returncode == 0
-            else:
-                # Check for executable commands
-                result = subprocess.run(['which', command], 
-                                      capture_output=True, text=True)
-                return result.returncode == 0
+            # dpkg-query exits non-zero for unknown names but still lists the rest
+            result = subprocess.run(['dpkg-query', '-W', '-f=${Package} ${Status}\\n'] + packages,
+                                  capture_output=True, text=True)
         except Exception:
-            return False
+            return set()
+        
+        installed = set()
+        for line in result.stdout.splitlines():
+            name, _, status = line.partition(' ')
+            if status.endswith(' installed'):
+                installed.add(name)
+        return installed
+    
+    def _check_system_package(self, command: str) -> bool:
+        """Check if a system command is available on PATH"""
+        return shutil.which(command) is not None
     
     def _auto_fix_dependencies(self) -> bool:
         """Automatically install missing dependencies"""
@@ -114,84 +232,128 @@ class SmartDependencyManager:
         
         success = True
         
-        # Install system packages first
-        if self.missing_system_packages:
-            success &= self._install_system_packages()
-        
-        # Install Python packages
-        if self.missing_python_packages:
-            success &= self._install_python_packages()
+        # apt may be installing pip itself or a python3-* package pip would also provide;
+        # pip then has to wait for apt to succeed
+        if any(pkg.startswith('python3') for pkg in self.missing_system_packages):
+            success = self._install_system_packages()
+            if success and self.missing_python_packages:
+                success = self._install_python_packages()
+        else:
+            # Otherwise apt and pip touch disjoint state, so run both installers at once
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                futures = []
+                if self.missing_system_packages:
+                    futures.append(executor.submit(self._install_system_packages))
+                if self.missing_python_packages:
+                    futures.append(executor.submit(self._install_python_packages))
+                for future in futures:
+                    success &= future.result()
         
         if success:
             self.logger.info("✅ Auto-fix completed successfully!")
+            # Drop cached results so the re-check sees the new packages
+            self._installed_set = None
+            _module_available.cache_clear()
+            importlib.invalidate_caches()
+            self._search_paths = tuple(sys.path)
             # Verify installation
-            return self.check_all_dependencies()
+            return self._verify_installed(self.missing_system_packages,
+                                          self.missing_python_packages)
         else:
             self.logger.error("❌ Auto-fix failed. Manual intervention required.")
             self._show_fix_instructions()
             return False
     
+    def _verify_installed(self, system_pkgs: List[str], python_pkgs: List[str]) -> bool:
+        """Re-check only the packages that were just installed"""
+        installed = self._query_installed_packages(system_pkgs)
+        self.missing_system_packages = [pkg for pkg in system_pkgs if pkg not in installed]
+        self.missing_python_packages = [
+            module for module in python_pkgs
+            if not _module_available(_REQUIRED_PYTHON_MODULES[module], self._search_paths)
+        ]
+        
+        if self.missing_system_packages or self.missing_python_packages:
+            self.logger.error("❌ Some dependencies are still missing after auto-fix")
+            self._show_fix_instructions()
+            return False
+        
+        self.logger.info("✅ All dependencies satisfied!")
+        return True
+    
     def _install_system_packages(self) -> bool:
         """Install missing system packages"""
         self.logger.info(f"Installing system packages: {self.missing_system_packages}")
         
         try:
-            # Update package list
-            subprocess.run(['apt', 'update'], check=True, capture_output=True)
+            # Update package list unless the cached index is recent enough
+            if self._apt_index_is_fresh():
+                self.logger.info("apt package index is recent, skipping apt update")
+            else:
+                returncode, _ = self._stream_command(['apt', 'update'])
+                if returncode != 0:
+                    raise subprocess.CalledProcessError(returncode, ['apt', 'update'])
             
             # Install packages
             cmd = ['apt', 'install', '-y'] + self.missing_system_packages
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            returncode, output_tail = self._stream_command(cmd)
             
-            if result.returncode == 0:
+            if returncode == 0:
                 self.installation_log.append("✅ System packages installed successfully")
                 return True
             else:
-                self.installation_log.append(f"❌ System package installation failed: {result.stderr}")
+                self.installation_log.append(f"❌ System package installation failed: {output_tail}")
                 return False
                 
         except Exception as e:
             self.installation_log.append(f"❌ System package installation error: {e}")
             return False
     
+    def _apt_index_is_fresh(self) -> bool:
+        """Check whether apt's package cache is younger than the update threshold"""
+        try:
+            max_age = float(os.environ.get('VERIWIPE_APT_UPDATE_MAX_AGE', 24 * 3600))
+            return time.time() - os.stat(_APT_PKGCACHE).st_mtime < max_age
+        except (OSError, ValueError):
+            return False
+    
     def _install_python_packages(self) -> bool:
         """Install missing Python packages"""
         self.logger.info(f"Installing Python packages: {self.missing_python_packages}")
         
         try:
-            # Create requirements mapping
-            package_mapping = {
-                'PyQt5': 'PyQt5>=5.15.4',
-                'cryptography': 'cryptography>=3.4.8',
-                'reportlab': 'reportlab>=3.6.0',
-                'qrcode': 'qrcode[pil]>=7.3.1',
-                'sklearn': 'scikit-learn>=1.0.0',
-                'numpy': 'numpy>=1.21.0',
-                'scipy': 'scipy>=1.7.0',
-                'psutil': 'psutil>=5.8.0',
-                'flask': 'flask>=2.0.0'
-            }
-            
             packages_to_install = [
-                package_mapping.get(pkg, pkg) 
+                _PYTHON_PACKAGE_SPECS.get(pkg, pkg) 
                 for pkg in self.missing_python_packages
             ]
             
             # Install packages
-            cmd = [sys.executable, '-m', 'pip', 'install', '--upgrade'] + packages_to_install
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            cmd = [sys.executable, '-m', 'pip', 'install', '--upgrade',
+                   '--no-input', '--disable-pip-version-check'] + packages_to_install
+            returncode, output_tail = self._stream_command(cmd)
             
-            if result.returncode == 0:
+            if returncode == 0:
                 self.installation_log.append("✅ Python packages installed successfully")
                 return True
             else:
-                self.installation_log.append(f"❌ Python package installation failed: {result.stderr}")
+                self.installation_log.append(f"❌ Python package installation failed: {output_tail}")
                 return False
                 
         except Exception as e:
             self.installation_log.append(f"❌ Python package installation error: {e}")
             return False
     
+    def _stream_command(self, cmd: List[str]) -> Tuple[int, str]:
+        """Run an installer, logging its output live and keeping only the tail"""
+        tail = deque(maxlen=100)
+        with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                              bufsize=1, text=True) as proc:
+            for line in proc.stdout:
+                line = line.rstrip()
+                self.logger.info(line)
+                tail.append(line)
+        return proc.returncode, '\n'.join(tail)
+    
     def _show_fix_instructions(self):
         """Show user-friendly fix instructions"""
         print("\n🔧 VeriWipe Dependency Fix Required")
@@ -253,10 +415,29 @@ echo "🚀 You can now run: python3 veriwipe.py"
         
         return str(installer_path)
 
-def smart_dependency_check() -> bool:
+@lru_cache(maxsize=1)
+def smart_dependency_check(early_exit: bool = False) -> bool:
     """Main entry point for smart dependency checking"""
+    key = _dependency_stamp_key()
+    try:
+        if _DEPS_STAMP.read_text() == key:
+            return True
+    except OSError:
+        pass
+    
     manager = SmartDependencyManager()
-    return manager.check_all_dependencies()
+    success = manager.check_all_dependencies(early_exit)
+    
+    # Only a passing check is remembered, so missing packages are always reported
+    if success:
+        try:
+            _DEPS_STAMP.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = _DEPS_STAMP.with_name(f"{_DEPS_STAMP.name}.{os.getpid()}")
+            tmp_path.write_text(key)
+            os.replace(tmp_path, _DEPS_STAMP)
+        except OSError as e:
+            logging.getLogger(__name__).debug(f"Could not write dependency stamp: {e}")
+    return success
 
 if __name__ == "__main__":
     # Standalone dependency checker
@@ -265,7 +446,7 @@ if __name__ == "__main__":
     manager = SmartDependencyManager()
     
     if "--auto-fix" in sys.argv:
-        if os.geteuid() != 0:
+        if not _IS_ROOT:
             print("❌ Auto-fix requires root privileges. Run with sudo.")
             sys.exit(1)
         success = manager.check_all_dependencies()
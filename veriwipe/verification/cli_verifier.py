@@ -5,13 +5,29 @@ Standalone tool for verifying VeriWipe certificates without web interface
 """
 
 import json
+import mmap
 import os
 import sys
 import argparse
 import base64
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from itertools import repeat
 from typing import Dict, Any
 
+# orjson is optional; it only speeds up parsing, and its JSONDecodeError subclasses json's
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# ciso8601 is optional; a C ISO 8601 parser that handles a trailing 'Z' itself
+try:
+    from ciso8601 import parse_datetime as _parse_timestamp
+except ImportError:
+    def _parse_timestamp(timestamp: str) -> datetime:
+        return datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+
 def load_public_key_simple(public_key_path: str) -> str:
     """Load public key as string for simple verification"""
     try:
@@ -25,8 +41,13 @@ def verify_certificate_simple(certificate_path: str, public_key_path: str = None
     """Simple certificate verification without cryptographic libraries"""
     try:
         # Load certificate
-        with open(certificate_path, 'r') as f:
-            cert_data = json.load(f)
+        with open(certificate_path, 'rb') as f:
+            if orjson is not None and os.fstat(f.fileno()).st_size:
+                # Parse straight from the mapped file rather than a read() copy of it
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                    cert_data = orjson.loads(view)
+            else:
+                cert_data = json.load(f)
         
         # Basic structure validation
         required_fields = [
@@ -48,7 +69,7 @@ def verify_certificate_simple(certificate_path: str, public_key_path: str = None
         # Validate timestamp
         try:
             timestamp = cert_data.get('timestamp', '')
-            datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+            _parse_timestamp(timestamp)
         except ValueError:
             return {
                 "valid": False,
@@ -73,6 +94,7 @@ def verify_certificate_simple(certificate_path: str, public_key_path: str = None
             "tool_info": cert_data.get('tool_info', {}),
             "compliance_info": cert_data.get('compliance_info', {}),
             "signature_present": bool(signature),
+            "signature_algorithm": cert_data.get('tool_info', {}).get('signature_algorithm') or cert_data.get('alg'),
             "note": "Basic validation only - cryptographic verification requires full setup"
         }
         
@@ -126,6 +148,7 @@ def print_verification_result(result: Dict[str, Any]):
         print(f"\\nTool Information:")
         print(f"  Name: {tool_info.get('name', 'N/A')}")
         print(f"  Version: {tool_info.get('version', 'N/A')}")
+        print(f"  Signature: {result.get('signature_algorithm') or 'N/A'}")
         
         if result.get('note'):
             print(f"\\nNote: {result['note']}")
@@ -143,6 +166,7 @@ def main():
         epilog="""
 Examples:
   %(prog)s certificate.json
+  %(prog)s certificates/*.json
   %(prog)s certificate.json --public-key public_key.pem
   %(prog)s --help
         """
@@ -150,7 +174,8 @@ Examples:
     
     parser.add_argument(
         'certificate',
-        help='Path to the VeriWipe certificate JSON file'
+        nargs='+',
+        help='Path to one or more VeriWipe certificate JSON files'
     )
     
     parser.add_argument(
@@ -172,16 +197,24 @@ Examples:
     
     args = parser.parse_args()
     
-    # Verify certificate
-    result = verify_certificate_simple(args.certificate, args.public_key)
+    # Verify certificates; several are spread across one process per core
+    if len(args.certificate) == 1:
+        results = [verify_certificate_simple(args.certificate[0], args.public_key)]
+    else:
+        with ProcessPoolExecutor() as executor:
+            results = list(executor.map(verify_certificate_simple, args.certificate,
+                                        repeat(args.public_key), chunksize=16))
     
     if args.json:
-        print(json.dumps(result, indent=2))
+        print(json.dumps(results[0] if len(results) == 1 else results, indent=2))
     else:
-        print_verification_result(result)
+        for path, result in zip(args.certificate, results):
+            if len(results) > 1:
+                print(f"\n{path}")
+            print_verification_result(result)
     
     # Exit with appropriate code
-    sys.exit(0 if result["valid"] else 1)
+    sys.exit(0 if all(result["valid"] for result in results) else 1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
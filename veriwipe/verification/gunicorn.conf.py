@@ -0,0 +1,24 @@
+"""
+Gunicorn configuration for the VeriWipe certificate verification server
+Usage: gunicorn -c verification/gunicorn.conf.py
+"""
+
+import multiprocessing
+import os
+
+wsgi_app = "web_verifier:app"
+chdir = os.path.dirname(os.path.abspath(__file__))
+bind = f"{os.environ.get('VERIWIPE_VERIFIER_HOST', '0.0.0.0')}:{os.environ.get('VERIWIPE_VERIFIER_PORT', '5000')}"
+
+# Signature checks are CPU-bound: one process per core, a few threads each for I/O waits
+workers = multiprocessing.cpu_count()
+worker_class = "gthread"
+threads = 4
+
+# Load the app (and parse the public key) once in the master; workers inherit it on fork
+preload_app = True
+
+def on_starting(server):
+    """Write the HTML templates before any worker serves a page"""
+    from web_verifier import create_templates
+    create_templates()
@@ -4,38 +4,184 @@ VeriWipe Certificate Verification Server
 Web interface for third-party validation of wipe certificates
 """
 
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, send_file, send_from_directory
 import json
 import os
+import re
 import hashlib
+import functools
+import html
+import string
+import gzip
+import threading
+from collections import OrderedDict
 from datetime import datetime
+from typing import Annotated, Any, Literal
 import qrcode
 import io
 import base64
 from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from cryptography.hazmat.primitives.asymmetric import utils as asym_utils
 from cryptography.hazmat.primitives.serialization import load_pem_public_key
 from cryptography.exceptions import InvalidSignature
 
+# orjson is optional; it only speeds up parsing. Canonical JSON for signatures stays on the
+# stdlib encoder, since that is what the generator signs (ASCII escapes, Python float repr)
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# ijson is optional; with it, uploaded files are parsed one top-level field at a time
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# msgspec is optional; with it, well-formed certificates are validated in one C-level pass
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+if msgspec is not None:
+    class _DeviceInfoSchema(msgspec.Struct):
+        device_type: Annotated[str, msgspec.Meta(min_length=1)]
+    
+    class _WipeOperationSchema(msgspec.Struct):
+        status: Literal['completed', 'failed']
+    
+    class _CertificateSchema(msgspec.Struct):
+        """The fields _validate_certificate_structure checks; any others are ignored"""
+        certificate_id: Any
+        timestamp: datetime
+        device_info: _DeviceInfoSchema
+        wipe_operation: _WipeOperationSchema
+        tool_info: Any
+        compliance_info: Any
+
+# ciso8601 is optional; a C ISO 8601 parser that handles a trailing 'Z' itself
+try:
+    from ciso8601 import parse_datetime as _parse_timestamp
+except ImportError:
+    def _parse_timestamp(timestamp: str) -> datetime:
+        return datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+
+# pybase64 is optional; a SIMD drop-in for base64.b64decode
+try:
+    from pybase64 import b64decode as _b64decode
+except ImportError:
+    _b64decode = base64.b64decode
+
+# htmlmin and brotli are optional; they shrink the precompressed index page further
+try:
+    import htmlmin
+except ImportError:
+    htmlmin = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# coincurve (libsecp256k1) is optional; it only speeds up secp256k1 keys
+try:
+    import coincurve
+except ImportError:
+    coincurve = None
+
+# Top-level fields added after signing, so left out of the signed canonical JSON
+_UNSIGNED_FIELDS = frozenset(('signature', 'blockchain_anchor'))
+
+# Top-level fields reported back or checked by _validate_certificate_structure
+_RESULT_FIELDS = frozenset(('certificate_id', 'timestamp', 'device_info',
+                            'wipe_operation', 'tool_info', 'compliance_info'))
+
+# Signature outcomes remembered per verifier, for clients that re-submit the same certificate
+_SIGNATURE_CACHE_SIZE = 16384
+
+# Upper bound on certificates accepted by one /api/verify/batch request
+_MAX_BATCH = 1000
+
+# Signature algorithm for EC keys; stateless, so one instance serves every verification.
+# The message is hashed by the caller, which lets a digest be built up incrementally
+_ECDSA_PREHASHED = ec.ECDSA(asym_utils.Prehashed(hashes.SHA256()))
+
+# QR PNGs rendered at certificate issuance, one file per certificate ID
+# (VERIWIPE_QR_DIR and VERIWIPE_VERIFY_BASE_URL are shared with certificate_generator.py)
+_QR_DIR = os.environ.get('VERIWIPE_QR_DIR', '/opt/veriwipe/qr')
+_QR_FILE_ID = re.compile(r'[A-Za-z0-9_-]{1,128}')
+
+# Public address of this service; QR codes never take it from the request's Host header
+_VERIFY_BASE_URL = os.environ.get('VERIWIPE_VERIFY_BASE_URL', 'https://verify.veriwipe.org/')
+
+def _verification_url(certificate_id: str) -> str:
+    """Public verification page for a certificate; must match certificate_generator._verification_url"""
+    return f"{_VERIFY_BASE_URL}verify/{certificate_id}"
+
 app = Flask(__name__)
+_TEMPLATE_DIR = os.path.join(app.root_path, app.template_folder)
 
 class CertificateVerifier:
     def __init__(self, public_key_path: str = None):
         self.public_key_path = public_key_path or "/opt/veriwipe/keys/public_key.pem"
         self.public_key = None
+        self._verify = None
+        self._verify_digest = None
+        self._key_algorithm = None
+        self._signature_cache = OrderedDict()
+        self._signature_cache_lock = threading.Lock()
         self.load_public_key()
     
     def load_public_key(self):
         """Load the public key for verification"""
+        with self._signature_cache_lock:
+            self._signature_cache.clear()
+        self._key_algorithm = None
         try:
             if os.path.exists(self.public_key_path):
                 with open(self.public_key_path, 'rb') as f:
                     self.public_key = load_pem_public_key(f.read())
+                # Resolve the key-type dispatch once; _verify(signature, data) raises InvalidSignature
+                if isinstance(self.public_key, ed25519.Ed25519PublicKey):
+                    self._verify = self.public_key.verify
+                    self._key_algorithm = "Ed25519"
+                elif isinstance(self.public_key, ec.EllipticCurvePublicKey):
+                    if self.public_key.curve.name == 'secp256r1':
+                        self._key_algorithm = "ECDSA-P256-SHA256"
+                    key_verify = self.public_key.verify
+                    # _verify_digest(signature, sha256_digest) is only available for EC keys
+                    self._verify_digest = lambda signature, digest: key_verify(signature, digest, _ECDSA_PREHASHED)
+                    self._verify = lambda signature, data: self._verify_digest(signature, hashlib.sha256(data).digest())
+                    if coincurve is not None and self.public_key.curve.name == 'secp256k1':
+                        self._verify = self._secp256k1_verifier(self._verify)
+                        self._verify_digest = None
+                else:
+                    print(f"Warning: Unsupported public key type {type(self.public_key).__name__}")
             else:
                 print(f"Warning: Public key not found at {self.public_key_path}")
         except Exception as e:
             print(f"Error loading public key: {e}")
     
+    def _secp256k1_verifier(self, fallback):
+        """Verify with libsecp256k1, deferring to fallback for anything it rejects"""
+        point = self.public_key.public_bytes(serialization.Encoding.X962,
+                                             serialization.PublicFormat.UncompressedPoint)
+        key = coincurve.PublicKey(point)
+        
+        def verify(signature: bytes, data: bytes):
+            # libsecp256k1 only accepts low-S signatures while OpenSSL signs with either,
+            # so a rejection is re-checked by cryptography before it counts as invalid
+            try:
+                if key.verify(signature, data, hasher=lambda message: hashlib.sha256(message).digest()):
+                    return
+            except ValueError:
+                pass
+            fallback(signature, data)
+        
+        return verify
+    
     def verify_certificate(self, certificate_data: dict) -> dict:
         """Verify a certificate's authenticity"""
         try:
@@ -44,52 +190,147 @@ class CertificateVerifier:
             if not signature:
                 return {"valid": False, "error": "No signature found"}
             
-            # Create a copy without signature for verification
-            cert_copy = certificate_data.copy()
-            cert_copy.pop('signature', None)
-            cert_copy.pop('blockchain_anchor', None)
+            if not self._verify:
+                return {"valid": False, "error": "Public key not available"}
+            
+            # Structure checks are cheap; a malformed certificate skips canonicalization and crypto
+            validation_result = self._validate_certificate_structure(certificate_data)
+            if not validation_result["valid"]:
+                return self._verification_result(certificate_data, None, validation_result)
             
-            # Create canonical JSON
-            canonical_json = json.dumps(cert_copy, sort_keys=True, separators=(',', ':'))
+            # Canonical JSON of the signed fields, built in one pass without copying and popping
+            signed_fields = {key: value for key, value in certificate_data.items()
+                             if key not in _UNSIGNED_FIELDS}
+            canonical_json = json.dumps(signed_fields, sort_keys=True, separators=(',', ':')).encode()
             
-            # Verify signature
-            if not self.public_key:
+            return self._check_certificate(certificate_data, validation_result, signature, canonical_json)
+            
+        except Exception as e:
+            return {"valid": False, "error": f"Verification error: {str(e)}"}
+    
+    def verify_certificate_stream(self, stream) -> dict:
+        """Verify a certificate file without building the whole document in memory"""
+        try:
+            if not self._verify:
                 return {"valid": False, "error": "Public key not available"}
             
-            try:
-                signature_bytes = base64.b64decode(signature)
-                self.public_key.verify(
-                    signature_bytes,
-                    canonical_json.encode(),
-                    ec.ECDSA(hashes.SHA256())
-                )
-                signature_valid = True
-            except InvalidSignature:
-                signature_valid = False
-            except Exception as e:
-                return {"valid": False, "error": f"Signature verification error: {str(e)}"}
+            # Each signed field is reduced to its canonical '"key":value' bytes as soon as
+            # it is parsed; only the fields reported back are kept as objects
+            signature = ''
+            fields = {}
+            fragments = []
+            for key, value in ijson.kvitems(stream, '', use_float=True):
+                if key == 'signature':
+                    signature = value
+                    continue
+                if key in _UNSIGNED_FIELDS:
+                    continue
+                fragments.append((key, (json.dumps(key) + ':'
+                                        + json.dumps(value, sort_keys=True, separators=(',', ':'))).encode()))
+                if key in _RESULT_FIELDS:
+                    fields[key] = value
             
-            # Additional validation
-            validation_result = self._validate_certificate_structure(certificate_data)
+            if not signature:
+                return {"valid": False, "error": "No signature found"}
             
-            return {
-                "valid": signature_valid and validation_result["valid"],
-                "signature_valid": signature_valid,
-                "structure_valid": validation_result["valid"],
-                "certificate_id": certificate_data.get('certificate_id'),
-                "timestamp": certificate_data.get('timestamp'),
-                "device_info": certificate_data.get('device_info', {}),
-                "wipe_operation": certificate_data.get('wipe_operation', {}),
-                "tool_info": certificate_data.get('tool_info', {}),
-                "compliance_info": certificate_data.get('compliance_info', {}),
-                "errors": validation_result.get("errors", [])
-            }
+            validation_result = self._validate_certificate_structure(fields)
+            if not validation_result["valid"]:
+                return self._verification_result(fields, None, validation_result)
+            
+            # Same bytes json.dumps(sort_keys=True) gives for the whole object
+            fragments.sort()
+            if self._verify_digest:
+                # ECDSA signs a SHA-256 digest, so the canonical bytes need never be joined
+                digest = hashlib.sha256(b'{')
+                for index, (_, fragment) in enumerate(fragments):
+                    digest.update(b',' + fragment if index else fragment)
+                digest.update(b'}')
+                return self._check_certificate(fields, validation_result, signature, digest=digest.digest())
             
+            canonical_json = b'{' + b','.join(fragment for _, fragment in fragments) + b'}'
+            return self._check_certificate(fields, validation_result, signature, canonical_json)
+            
+        except ijson.JSONError:
+            return {"valid": False, "error": "Invalid JSON file"}
         except Exception as e:
             return {"valid": False, "error": f"Verification error: {str(e)}"}
     
+    def _check_certificate(self, certificate_data: dict, validation_result: dict, signature: str,
+                           canonical_json: bytes = None, digest: bytes = None) -> dict:
+        """Check the signature over canonical_json (or its SHA-256 digest) of a well-formed certificate"""
+        # Certificates name their scheme in tool_info; one signed with another scheme cannot match this key
+        tool_info = certificate_data.get('tool_info')
+        algorithm = tool_info.get('signature_algorithm') if isinstance(tool_info, dict) else None
+        if algorithm and self._key_algorithm and algorithm != self._key_algorithm:
+            return self._verification_result(certificate_data, False, {
+                "valid": validation_result["valid"],
+                "errors": validation_result.get("errors", []) + [
+                    f"Certificate is signed with {algorithm}, verification key is {self._key_algorithm}"]
+            })
+        
+        # Verify signature
+        try:
+            signature_bytes = _b64decode(signature)
+            if digest is None:
+                digest = hashlib.sha256(canonical_json).digest()
+            
+            # The signature and the digest of everything it covers identify the outcome
+            cache_key = (signature_bytes, digest)
+            with self._signature_cache_lock:
+                signature_valid = self._signature_cache.get(cache_key)
+                if signature_valid is not None:
+                    self._signature_cache.move_to_end(cache_key)
+            
+            if signature_valid is None:
+                try:
+                    if canonical_json is None:
+                        self._verify_digest(signature_bytes, digest)
+                    else:
+                        self._verify(signature_bytes, canonical_json)
+                    signature_valid = True
+                except InvalidSignature:
+                    signature_valid = False
+                
+                with self._signature_cache_lock:
+                    self._signature_cache[cache_key] = signature_valid
+                    if len(self._signature_cache) > _SIGNATURE_CACHE_SIZE:
+                        self._signature_cache.popitem(last=False)
+        except Exception as e:
+            return {"valid": False, "error": f"Signature verification error: {str(e)}"}
+        
+        return self._verification_result(certificate_data, signature_valid, validation_result)
+    
+    def _verification_result(self, certificate_data: dict, signature_valid, validation_result: dict) -> dict:
+        """Response for a checked certificate; signature_valid is None when the signature was not checked"""
+        return {
+            "valid": bool(signature_valid) and validation_result["valid"],
+            "signature_valid": signature_valid,
+            "structure_valid": validation_result["valid"],
+            "certificate_id": certificate_data.get('certificate_id'),
+            "timestamp": certificate_data.get('timestamp'),
+            "device_info": certificate_data.get('device_info', {}),
+            "wipe_operation": certificate_data.get('wipe_operation', {}),
+            "tool_info": certificate_data.get('tool_info', {}),
+            "compliance_info": certificate_data.get('compliance_info', {}),
+            "errors": validation_result.get("errors", [])
+        }
+    
+    def verify_batch(self, certificates: list) -> list:
+        """Verify several certificates, returning one result per certificate in order"""
+        # Neither cryptography nor libsodium exposes Ed25519 batch verification, so each is checked alone
+        return [self.verify_certificate(cert) if isinstance(cert, dict)
+                else {"valid": False, "error": "Certificate must be a JSON object"}
+                for cert in certificates]
+    
     def _validate_certificate_structure(self, cert_data: dict) -> dict:
         """Validate the structure and content of the certificate"""
+        if msgspec is not None:
+            try:
+                msgspec.convert(cert_data, _CertificateSchema)
+                return {"valid": True, "errors": []}
+            except msgspec.ValidationError:
+                pass  # Fall through to collect every problem, not just the first
+        
         errors = []
         
         # Required fields
@@ -104,7 +345,7 @@ class CertificateVerifier:
         
         # Validate timestamp
         try:
-            datetime.fromisoformat(cert_data.get('timestamp', '').replace('Z', '+00:00'))
+            _parse_timestamp(cert_data.get('timestamp', ''))
         except ValueError:
             errors.append("Invalid timestamp format")
         
@@ -129,7 +370,19 @@ verifier = CertificateVerifier()
 @app.route('/')
 def index():
     """Main verification page"""
-    return render_template('index.html')
+    # The page is static HTML, so it is sent as a file rather than rendered through Jinja,
+    # precompressed by create_templates() when the client accepts it
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if encoding in request.accept_encodings and os.path.exists(os.path.join(_TEMPLATE_DIR, 'index.html' + suffix)):
+            response = send_from_directory(_TEMPLATE_DIR, 'index.html' + suffix,
+                                           mimetype='text/html', max_age=3600)
+            response.headers['Content-Encoding'] = encoding
+            response.vary.add('Accept-Encoding')
+            return response
+    
+    response = send_from_directory(_TEMPLATE_DIR, 'index.html', max_age=3600)
+    response.vary.add('Accept-Encoding')
+    return response
 
 @app.route('/verify', methods=['POST'])
 def verify():
@@ -141,8 +394,11 @@ def verify():
             if file.filename == '':
                 return jsonify({"error": "No file selected"})
             
+            if ijson is not None:
+                return jsonify(verifier.verify_certificate_stream(file.stream))
+            
             try:
-                certificate_data = json.load(file)
+                certificate_data = _json_loads(file.read())
             except json.JSONDecodeError:
                 return jsonify({"error": "Invalid JSON file"})
                 
@@ -157,7 +413,7 @@ def verify():
                 return jsonify({"error": "No certificate data provided"})
             
             try:
-                certificate_data = json.loads(cert_text)
+                certificate_data = _json_loads(cert_text)
             except json.JSONDecodeError:
                 return jsonify({"error": "Invalid JSON format"})
         
@@ -185,22 +441,53 @@ def api_verify():
     """API endpoint for certificate verification"""
     return verify()
 
-@app.route('/qr/<certificate_id>')
-def generate_qr(certificate_id):
-    """Generate QR code for certificate verification"""
-    verification_url = f"{request.url_root}verify/{certificate_id}"
-    
+@app.route('/api/verify/batch', methods=['POST'])
+def api_verify_batch():
+    """API endpoint verifying a JSON array of certificates in one request"""
+    try:
+        try:
+            certificates = _json_loads(request.get_data())
+        except json.JSONDecodeError:
+            return jsonify({"error": "Invalid JSON format"})
+        
+        if not isinstance(certificates, list):
+            return jsonify({"error": "Expected a JSON array of certificates"})
+        if len(certificates) > _MAX_BATCH:
+            return jsonify({"error": f"Batch too large (maximum {_MAX_BATCH} certificates)"})
+        
+        results = verifier.verify_batch(certificates)
+        return jsonify({
+            "results": results,
+            "valid_count": sum(1 for result in results if result.get("valid"))
+        })
+        
+    except Exception as e:
+        return jsonify({"error": f"Verification failed: {str(e)}"})
+
+@functools.lru_cache(maxsize=4096)
+def _qr_png_bytes(url: str) -> bytes:
+    """Render a QR code for url as PNG; the URL fully determines the image, so it is cached"""
     qr = qrcode.QRCode(version=1, box_size=10, border=5)
-    qr.add_data(verification_url)
+    qr.add_data(url)
     qr.make(fit=True)
     
     img = qr.make_image(fill_color="black", back_color="white")
     
     img_buffer = io.BytesIO()
     img.save(img_buffer, format='PNG')
-    img_buffer.seek(0)
+    return img_buffer.getvalue()
+
+@app.route('/qr/<certificate_id>')
+def generate_qr(certificate_id):
+    """Generate QR code for certificate verification"""
+    # Issued certificates already have their PNG on disk; nothing is written here
+    if _QR_FILE_ID.fullmatch(certificate_id):
+        file_name = f"{certificate_id}.png"
+        if os.path.isfile(os.path.join(_QR_DIR, file_name)):
+            return send_from_directory(_QR_DIR, file_name, mimetype='image/png', max_age=604800)
     
-    return send_file(img_buffer, mimetype='image/png')
+    # Certificate IDs never change meaning, so clients may keep the image for a day
+    return send_file(io.BytesIO(_qr_png_bytes(_verification_url(certificate_id))), mimetype='image/png', max_age=86400)
 
 @app.route('/health')
 def health():
@@ -213,30 +500,27 @@ def health():
     })
 
 # Error handlers
+@functools.lru_cache(maxsize=1)
+def _error_page() -> string.Template:
+    """error.html, read once; its only placeholders are $error_code and $error_message"""
+    with open(os.path.join(_TEMPLATE_DIR, 'error.html'), encoding='utf-8') as f:
+        return string.Template(f.read())
+
+def _render_error(error_code: int, error_message: str):
+    return _error_page().substitute(error_code=error_code,
+                                    error_message=html.escape(error_message)), error_code
+
 @app.errorhandler(404)
 def not_found(error):
-    return render_template('error.html', 
-                         error_code=404,
-                         error_message="Page not found"), 404
+    return _render_error(404, "Page not found")
 
 @app.errorhandler(500)
 def server_error(error):
-    return render_template('error.html',
-                         error_code=500, 
-                         error_message="Internal server error"), 500
-
-if __name__ == '__main__':
-    # Create templates directory and basic templates
-    os.makedirs('templates', exist_ok=True)
-    
-    # Create basic HTML templates
-    create_templates()
-    
-    # Run the application
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    return _render_error(500, "Internal server error")
 
 def create_templates():
     """Create basic HTML templates"""
+    os.makedirs(_TEMPLATE_DIR, exist_ok=True)
     
     # Main index template
     index_html = """
@@ -501,8 +785,20 @@ def create_templates():
 </html>
     """
     
-    with open('templates/index.html', 'w') as f:
-        f.write(index_html)
+    if htmlmin is not None:
+        index_html = htmlmin.minify(index_html, remove_comments=True, remove_empty_space=True)
+    
+    index_data = index_html.encode('utf-8')
+    index_path = os.path.join(_TEMPLATE_DIR, 'index.html')
+    with open(index_path, 'wb') as f:
+        f.write(index_data)
+    
+    # Compress once here so requests never pay for it; mtime=0 keeps the .gz reproducible
+    with open(index_path + '.gz', 'wb') as f:
+        f.write(gzip.compress(index_data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(index_path + '.br', 'wb') as f:
+            f.write(brotli.compress(index_data, quality=11))
     
     # Error template
     error_html = """
@@ -556,13 +852,20 @@ def create_templates():
 </head>
 <body>
     <div class="error-container">
-        <h1 class="error-code">{{ error_code }}</h1>
-        <p class="error-message">{{ error_message }}</p>
+        <h1 class="error-code">$error_code</h1>
+        <p class="error-message">$error_message</p>
         <a href="/" class="btn">🏠 Return Home</a>
     </div>
 </body>
 </html>
     """
     
-    with open('templates/error.html', 'w') as f:
-        f.write(error_html)
\ No newline at end of file
+    with open(os.path.join(_TEMPLATE_DIR, 'error.html'), 'w', encoding='utf-8') as f:
+        f.write(error_html)
+
+if __name__ == '__main__':
+    # Create basic HTML templates
+    create_templates()
+    
+    # Development server only; deployments run under gunicorn (see gunicorn.conf.py)
+    app.run(host='0.0.0.0', port=5000, debug=True)
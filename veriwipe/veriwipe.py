@@ -7,22 +7,43 @@ Launches the VeriWipe application with proper error handling and logging
 import sys
 import os
 import logging
-import argparse
-from pathlib import Path
 
 # Add src directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
+# --info output is reused for a short while
+_SYSINFO_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "veriwipe", "sysinfo.json")
+_SYSINFO_TTL = 30.0
+
+_VERSION = 'VeriWipe v1.0.0 - Smart India Hackathon 2025'
+
+# Set once setup_logging has installed its handlers
+_logging_configured = False
+
+class _LazyFileHandler(logging.FileHandler):
+    """FileHandler that creates its directory and file only when the first record is written"""
+    
+    def __init__(self, filename):
+        super().__init__(filename, delay=True)
+    
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
 def setup_logging(log_level: str = "INFO"):
     """Set up logging configuration"""
-    log_dir = Path("/var/log/veriwipe")
-    log_dir.mkdir(exist_ok=True, parents=True)
+    global _logging_configured
+    if _logging_configured:
+        return
+    _logging_configured = True
+    
+    log_dir = "/var/log/veriwipe"
     
     logging.basicConfig(
         level=getattr(logging, log_level.upper()),
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
         handlers=[
-            logging.FileHandler(log_dir / "veriwipe.log"),
+            _LazyFileHandler(os.path.join(log_dir, "veriwipe.log")),
             logging.StreamHandler(sys.stdout)
         ]
     )
@@ -38,27 +59,11 @@ def check_dependencies():
 
 def _basic_dependency_check():
     """Basic dependency check (fallback)"""
-    missing_deps = []
+    import importlib.util
     
-    try:
-        import PyQt5
-    except ImportError:
-        missing_deps.append("PyQt5")
-    
-    try:
-        import cryptography
-    except ImportError:
-        missing_deps.append("cryptography")
-    
-    try:
-        import reportlab
-    except ImportError:
-        missing_deps.append("reportlab")
-    
-    try:
-        import qrcode
-    except ImportError:
-        missing_deps.append("qrcode")
+    # find_spec only locates the packages; importing PyQt5 here would load the Qt bindings
+    missing_deps = [name for name in ("PyQt5", "cryptography", "reportlab", "qrcode")
+                    if importlib.util.find_spec(name) is None]
     
     if missing_deps:
         print(f"❌ Missing dependencies: {', '.join(missing_deps)}")
@@ -68,33 +73,50 @@ def _basic_dependency_check():
     
     return True
 
-def check_permissions():
+def check_permissions(assume_yes: bool = False):
     """Check if running with appropriate permissions"""
     if os.geteuid() != 0:
         print("Warning: VeriWipe should be run as root for full functionality")
         print("Some disk operations may fail without root privileges")
+        if assume_yes:
+            return True
+        # Nobody can answer the prompt in a script or pipeline, so take the default
+        if not sys.stdin.isatty():
+            print("Not running interactively; aborting (use --yes to continue anyway)")
+            return False
         response = input("Continue anyway? (y/N): ")
         if response.lower() != 'y':
             return False
     return True
 
-def launch_gui():
+def launch_gui(embed_log: bool = False):
     """Launch the GUI application"""
     try:
         from gui.main_window import main as gui_main
-        gui_main()
+    except ImportError as e:
+        logging.error(f"GUI is unavailable: {e}")
+        print(f"Error loading GUI: {e}")
+        return 1
+    
+    try:
+        gui_main(embed_log)
     except Exception as e:
         logging.error(f"Failed to launch GUI: {e}")
         print(f"Error launching GUI: {e}")
         return 1
     return 0
 
-def launch_cli():
+def launch_cli(deep_probe: bool = False):
     """Launch CLI mode (for testing and automation)"""
     try:
         from ai_engine.ai_wipe_engine import AIWipeEngine
         from wipe_core.wipe_engine import WipeCore
-        
+    except ImportError as e:
+        logging.error(f"CLI mode is unavailable: {e}")
+        print(f"Error loading CLI mode: {e}")
+        return 1
+    
+    try:
         print("VeriWipe CLI Mode")
         print("================")
         
@@ -102,16 +124,16 @@ def launch_cli():
         wipe_core = WipeCore(ai_engine)
         
         print("Detecting devices...")
-        devices = ai_engine.detect_devices()
+        devices = ai_engine.detect_devices(deep_probe=deep_probe)
         
         if not devices:
             print("No devices detected.")
             return 1
         
         print(f"Found {len(devices)} device(s):")
-        for i, device in enumerate(devices):
+        methods = ai_engine.select_optimal_wipe_methods(devices)
+        for i, (device, method) in enumerate(zip(devices, methods)):
             print(f"{i+1}. {device.device_path} - {device.model} ({device.size_gb:.2f} GB)")
-            method = ai_engine.select_optimal_wipe_method(device)
             print(f"   Recommended method: {method.value}")
         
         return 0
@@ -124,6 +146,43 @@ def launch_cli():
 def show_system_info():
     """Show system information relevant to VeriWipe"""
     import platform
+    import hashlib
+    import io
+    import json
+    import time
+    from contextlib import redirect_stdout
+    
+    # Tools and block devices rarely change; reuse a recent report taken by the same user and environment
+    key = hashlib.blake2b(f"{platform.uname()}|{os.environ.get('PATH', '')}|{os.getenv('USER')}|{os.getuid()}".encode(),
+                          digest_size=16).hexdigest()
+    try:
+        with open(_SYSINFO_CACHE, encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached["key"] == key and 0 <= time.time() - cached["ts"] < _SYSINFO_TTL:
+            print(cached["body"], end='')
+            return
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    
+    buf = io.StringIO()
+    with redirect_stdout(buf):
+        _collect_system_info()
+    body = buf.getvalue()
+    print(body, end='')
+    
+    try:
+        os.makedirs(os.path.dirname(_SYSINFO_CACHE), exist_ok=True)
+        tmp_path = f"{_SYSINFO_CACHE}.{os.getpid()}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"key": key, "ts": time.time(), "body": body}, f)
+        os.replace(tmp_path, _SYSINFO_CACHE)
+    except OSError as e:
+        logging.debug(f"Could not cache system information: {e}")
+
+def _collect_system_info():
+    """Print the system information report"""
+    import platform
+    import shutil
     import subprocess
     
     print("VeriWipe System Information")
@@ -133,30 +192,87 @@ def show_system_info():
     print(f"Python: {platform.python_version()}")
     print(f"User: {os.getenv('USER', 'unknown')} (UID: {os.getuid()})")
     
+    # Hashing runs on OpenSSL; SHA-NI makes log and certificate hashing much faster
+    import ssl
+    try:
+        with open('/proc/cpuinfo') as f:
+            sha_ni = 'sha_ni' in f.read()
+    except OSError:
+        sha_ni = False
+    print(f"OpenSSL: {ssl.OPENSSL_VERSION}")
+    print(f"SHA-NI: {'available' if sha_ni else 'not available'}")
+    
     # Check available disk tools
     tools = ['hdparm', 'nvme', 'cryptsetup', 'smartctl', 'blkdiscard']
     print("\\nAvailable disk tools:")
     for tool in tools:
-        try:
-            result = subprocess.run(['which', tool], capture_output=True, text=True)
-            if result.returncode == 0:
-                print(f"  ✅ {tool}: {result.stdout.strip()}")
-            else:
-                print(f"  ❌ {tool}: Not found")
-        except Exception:
-            print(f"  ❌ {tool}: Error checking")
+        path = shutil.which(tool)
+        if path:
+            print(f"  ✅ {tool}: {path}")
+        else:
+            print(f"  ❌ {tool}: Not found")
     
     # Check disk devices
     print("\\nBlock devices:")
+    sys_block = '/sys/block'
+    if not os.path.isdir(sys_block):
+        # No sysfs (non-Linux); ask lsblk instead
+        try:
+            result = subprocess.run(['lsblk', '-d', '-o', 'NAME,TYPE,SIZE,MODEL'], 
+                                  capture_output=True, text=True)
+            if result.returncode == 0:
+                print(result.stdout)
+        except Exception as e:
+            print(f"Error listing devices: {e}")
+        return
+    
+    # Same columns as `lsblk -d -o NAME,TYPE,SIZE,MODEL`, read straight from sysfs
+    rows = []
     try:
-        result = subprocess.run(['lsblk', '-d', '-o', 'NAME,TYPE,SIZE,MODEL'], 
-                              capture_output=True, text=True)
-        if result.returncode == 0:
-            print(result.stdout)
-    except Exception as e:
+        for dev in sorted(os.listdir(sys_block)):
+            with open(os.path.join(sys_block, dev, 'size')) as f:
+                size = int(f.read()) * 512
+            if dev.startswith('ram') or (dev.startswith('loop') and size == 0):
+                continue
+            dev_type = 'loop' if dev.startswith('loop') else 'rom' if dev.startswith('sr') else 'disk'
+            try:
+                with open(os.path.join(sys_block, dev, 'device', 'model')) as f:
+                    model = f.read().strip()
+            except OSError:
+                model = ''
+            rows.append((dev, dev_type, _format_size(size), model))
+    except (OSError, ValueError) as e:
         print(f"Error listing devices: {e}")
+    if rows:
+        name_width = max(4, *(len(row[0]) for row in rows))
+        size_width = max(4, *(len(row[2]) for row in rows))
+        print(f"{'NAME':<{name_width}} TYPE {'SIZE':>{size_width}} MODEL")
+        for name, dev_type, size, model in rows:
+            print(f"{name:<{name_width}} {dev_type:<4} {size:>{size_width}} {model}")
+        print()
+
+def _format_size(size: int) -> str:
+    """Format a byte count the way lsblk does (binary units, one decimal)"""
+    value = float(size)
+    for unit in ('B', 'K', 'M', 'G', 'T', 'P'):
+        if value < 1024 or unit == 'P':
+            break
+        value /= 1024
+    text = f"{value:.1f}"
+    return f"{text[:-2] if text.endswith('.0') else text}{unit}"
 
 def main():
+    # The argument-free modes are answered without building the parser
+    argv = sys.argv[1:]
+    if argv == ['--version']:
+        print(_VERSION)
+        return 0
+    if argv in (['--info'], ['-i']):
+        show_system_info()
+        return 0
+    
+    import argparse
+    
     parser = argparse.ArgumentParser(
         description="VeriWipe - AI-Powered Secure Data Wiping",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -200,6 +316,24 @@ Examples:
         help='Skip GUI dependency check (for CLI mode)'
     )
     
+    parser.add_argument(
+        '--deep-probe',
+        action='store_true',
+        help='Query smartctl/hdparm/nvme during device detection (slower)'
+    )
+    
+    parser.add_argument(
+        '--embed-log',
+        action='store_true',
+        help='Embed the full operation log in certificates (default: chain summary only)'
+    )
+    
+    parser.add_argument(
+        '--yes', '-y',
+        action='store_true',
+        help='Continue without root privileges instead of prompting'
+    )
+    
     parser.add_argument(
         '--auto-fix',
         action='store_true',
@@ -209,7 +343,7 @@ Examples:
     parser.add_argument(
         '--version',
         action='version',
-        version='VeriWipe v1.0.0 - Smart India Hackathon 2025'
+        version=_VERSION
     )
     
     args = parser.parse_args()
@@ -234,13 +368,7 @@ Examples:
             print(f"❌ Auto-fix error: {e}")
             return 1
     
-    # Set up logging
-    setup_logging(args.log_level)
-    logger = logging.getLogger(__name__)
-    
-    logger.info("VeriWipe starting...")
-    
-    # Handle special modes first
+    # Handle special modes first; they need neither logging nor the dependency check
     if args.info:
         show_system_info()
         return 0
@@ -251,20 +379,26 @@ Examples:
         print_verification_result(result)
         return 0 if result["valid"] else 1
     
+    # Set up logging
+    setup_logging(args.log_level)
+    logger = logging.getLogger(__name__)
+    
+    logger.info("VeriWipe starting...")
+    
     # Check dependencies (skip GUI check for CLI mode)
     if not args.cli and not args.no_gui_check:
         if not check_dependencies():
             return 1
     
     # Check permissions
-    if not check_permissions():
+    if not check_permissions(args.yes):
         return 1
     
     # Launch appropriate mode
     if args.cli:
-        return launch_cli()
+        return launch_cli(args.deep_probe)
     else:
-        return launch_gui()
+        return launch_gui(args.embed_log)
 
 if __name__ == "__main__":
     try: